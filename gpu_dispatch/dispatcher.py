@@ -1,47 +1,94 @@
+import itertools
 import multiprocessing as mp
 import os
+import pickle
+import queue
 import signal
 import sys
 import threading
+import time
+from multiprocessing import BufferTooShort
+from multiprocessing.connection import Connection, wait
 from queue import Empty, Full
-from typing import Any, Callable, Iterable
-
-from gpu_dispatch.worker import BaseWorker, _worker_main
-from gpu_dispatch.protocol import TaskSuccess, TaskError, TaskTimeout, TaskStarted, SetupFailed, CleanupFailed
+from typing import Any, Callable, Iterable, Iterator
+
+from gpu_dispatch.local import LocalConnection, LocalRing
+from gpu_dispatch.ring import SPMCRing
+from gpu_dispatch.serialization import encode_message
+from gpu_dispatch.worker import BaseWorker, _worker_main, _worker_thread_main
+from gpu_dispatch.protocol import (
+    _MESSAGE_TYPES,
+    TaskSuccess,
+    TaskError,
+    TaskTimeout,
+    TaskStarted,
+    SetupFailed,
+    CleanupFailed,
+    FeederDone,
+)
 
 SuccessCallback = Callable[[int, Any, int], None]
+SuccessBatchCallback = Callable[[list[tuple[int, Any, int]]], None]
 ErrorCallback = Callable[[int, str, int], None]
 TimeoutCallback = Callable[[int, float, int], None]
 SetupFailCallback = Callable[[int, str], None]
 StartCallback = Callable[[int, int], None]
 ExitCallback = Callable[[], None]
 
+# Longest time the feeder holds a partially filled task batch
+_BATCH_FLUSH_INTERVAL = 0.005
+
+# "shared": one task ring consumed by every worker.
+# "round_robin": one ring per worker, filled in turn; idle workers steal.
+# "least_loaded": one ring per worker, each batch goes to the shallowest
+# ring; idle workers steal.
+_SCHEDULERS = ("shared", "round_robin", "least_loaded")
+
+# struct codes accepted for payload_format: each either packs a value of its
+# type exactly or refuses it (struct.error), which falls back to pickle.
+# "?", "e"/"f", "c" and "s"/"p" would coerce, round or truncate instead.
+_PAYLOAD_FORMATS = ("b", "B", "h", "H", "i", "I", "l", "L", "q", "Q", "d")
+
+# Where workers run. "processes": one process per worker, tasks and results
+# pickled through shared memory and pipes. "threads": one thread per worker
+# in the dispatcher's process, handing objects over by reference; for
+# workers whose process() releases the GIL or is too short for IPC to pay off.
+_BACKENDS = ("processes", "threads")
+
+# Initial size of the monitor's reusable receive buffer; grows on demand
+_RECV_BUFFER_SIZE = 64 * 1024
+# Most result batches the monitor reads from one pipe per wake-up
+_MAX_DRAIN = 16
+
+# Marks the end of the outcome stream produced by Dispatcher.imap
+_STREAM_END = object()
+
+# Dispatchers currently running a submission, shut down together on
+# SIGINT/SIGTERM. The handlers are installed by the outermost submission on
+# the main thread (the only thread allowed to set them) and cover nested
+# submissions and those on other threads, instead of each one swapping the
+# handlers in and out. Between submissions Ctrl-C raises KeyboardInterrupt
+# as usual.
+_active_dispatchers: list["Dispatcher"] = []
+_original_handlers: dict[int, Any] | None = None
+_signal_lock = threading.Lock()
+
+# 1 for message kinds that finish a task, indexed by kind
+_COMPLETES_TASK = tuple(int(cls in (TaskSuccess, TaskError, TaskTimeout)) for cls in _MESSAGE_TYPES)
+
 
 def _worker_main_silenced(*args, **kwargs):
     """Wrapper that suppresses worker stdout/stderr to keep UI clean."""
-    # Redirect stdout and stderr at the file descriptor level
-    # This catches everything including loguru and direct writes
+    # Redirect at the file descriptor level so loguru, C extensions and
+    # direct writes are caught too. The worker process exits afterwards,
+    # so there is nothing to restore.
     devnull_fd = os.open(os.devnull, os.O_WRONLY)
-    old_stdout_fd = os.dup(1)
-    old_stderr_fd = os.dup(2)
-
-    try:
-        # Redirect file descriptors
-        os.dup2(devnull_fd, 1)  # stdout
-        os.dup2(devnull_fd, 2)  # stderr
-
-        # Also redirect Python-level streams
-        sys.stdout = open(os.devnull, 'w')
-        sys.stderr = open(os.devnull, 'w')
+    os.dup2(devnull_fd, 1)
+    os.dup2(devnull_fd, 2)
+    os.close(devnull_fd)
+    sys.stdout = sys.stderr = open(os.devnull, 'w')
 
-        _worker_main(*args, **kwargs)
-    finally:
-        # Restore original file descriptors
-        os.dup2(old_stdout_fd, 1)
-        os.dup2(old_stderr_fd, 2)
-        os.close(old_stdout_fd)
-        os.close(old_stderr_fd)
-        os.close(devnull_fd)
+    _worker_main(*args, **kwargs)
 
 
 class Dispatcher:
@@ -51,6 +98,13 @@ class Dispatcher:
         gpu_ids: list[int],
         queue_size: int = 1024,
         suppress_worker_output: bool = False,
+        batch_size: int = 1,
+        scheduler: str = "shared",
+        start_method: str = "spawn",
+        pin_cpus: bool = False,
+        payload_format: str | None = None,
+        sched_batch: bool = False,
+        backend: str = "processes",
     ):
         if not issubclass(worker_cls, BaseWorker):
             raise TypeError(f"worker_cls must inherit from BaseWorker, got {worker_cls}")
@@ -58,23 +112,102 @@ class Dispatcher:
         if not gpu_ids:
             raise ValueError("gpu_ids cannot be empty")
 
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        if scheduler not in _SCHEDULERS:
+            raise ValueError(f"scheduler must be one of {_SCHEDULERS}, got {scheduler!r}")
+
+        if backend not in _BACKENDS:
+            raise ValueError(f"backend must be one of {_BACKENDS}, got {backend!r}")
+
+        if backend == "threads":
+            # Set per worker process, so none of these apply to thread workers
+            process_only = {
+                "pin_cpus": pin_cpus,
+                "sched_batch": sched_batch,
+                "payload_format": payload_format is not None,
+                "suppress_worker_output": suppress_worker_output,
+            }
+            unsupported = [name for name, enabled in process_only.items() if enabled]
+            if unsupported:
+                raise ValueError(f"backend='threads' does not support {', '.join(unsupported)}")
+
+        if payload_format is not None and payload_format not in _PAYLOAD_FORMATS:
+            raise ValueError(f"payload_format must be one of {_PAYLOAD_FORMATS}, got {payload_format!r}")
+
         self.worker_cls = worker_cls
         self.gpu_ids = gpu_ids
         self.queue_size = queue_size
         self.suppress_worker_output = suppress_worker_output
-
-        self.ctx = mp.get_context('spawn')
-        self._shutdown_event = None
+        self.batch_size = batch_size
+        self.scheduler = scheduler
+        self.backend = backend
+        # Pinning keeps the ring counters' cache lines between fixed cores;
+        # only supported where the OS exposes sched_setaffinity (Linux)
+        self.pin_cpus = pin_cpus and hasattr(os, "sched_setaffinity")
+        # SCHED_BATCH tells the kernel workers are CPU-bound so it stops
+        # preempting them to favour interactivity; Linux only
+        self.sched_batch = sched_batch and hasattr(os, "SCHED_BATCH")
+        # Tasks that all pack with this struct code (e.g. "q" for ints) are
+        # stored raw in the task rings instead of being pickled
+        self.payload_format = payload_format
+
+        # "fork" skips re-importing the module tree in every worker, but is
+        # only safe if the parent has not initialized CUDA (or other
+        # fork-unsafe runtimes) before run() is called.
+        self.ctx = mp.get_context(start_method)
+        if start_method == "forkserver":
+            self.ctx.set_forkserver_preload(["gpu_dispatch.worker"])
+        # Lives as long as the dispatcher rather than one session, so a
+        # shutdown() from a signal arriving while the workers are still being
+        # started is not lost; cleared when the next run begins
+        self._shutdown_event = threading.Event() if backend == "threads" else self.ctx.Event()
+        # Stops the feeder of the current submission
+        self._feeder_stop = None
+        self._control_send = None
+        self._control_recv = None
+        self._task_queues = []
+        # Session state between start() and close()
+        self._worker_queues = []
+        self._processes = []
+        self._result_conns = []
+        self._live_conns = []
+        self._active_workers = 0
+        self._original_affinity = None
+        self._submitting = False
+        # Task ids handed to the workers continue past those of an aborted
+        # submission, whose results may still arrive; see _finish_submission
+        self._first_task_id = 0
 
     def shutdown(self) -> None:
         """Signal the dispatcher to shut down gracefully."""
-        if self._shutdown_event is not None:
-            self._shutdown_event.set()
+        self._shutdown_event.set()
+        if self._feeder_stop is not None:
+            self._feeder_stop.set()
+        # Unblock a feeder waiting for space in a full ring
+        for task_queue in self._task_queues:
+            task_queue.cancel_put()
+        # An empty batch just wakes the monitor so it re-checks shutdown
+        self._send_control([])
+
+    def _send_control(self, messages: list) -> None:
+        """Deliver messages from the dispatcher process itself to the monitor."""
+        control_send = self._control_send
+        if control_send is not None:
+            payload = [encode_message(message) for message in messages]
+            try:
+                if type(control_send) is LocalConnection:
+                    control_send.send(payload)
+                else:
+                    control_send.send_bytes(pickle.dumps(payload, protocol=5))
+            except OSError:
+                pass
 
     def run(
         self,
         generator: Iterable[Any],
-        on_success: SuccessCallback,
+        on_success: SuccessCallback | None = None,
         on_error: ErrorCallback | None = None,
         on_timeout: TimeoutCallback | None = None,
         on_setup_fail: SetupFailCallback | None = None,
@@ -83,118 +216,513 @@ class Dispatcher:
         base_seed: int = 42,
         task_timeout: float | None = None,
         total_tasks: int | None = None,
+        on_success_batch: SuccessBatchCallback | None = None,
+        prefetch: bool = False,
         **setup_kwargs,
     ) -> None:
-        task_queue = self.ctx.Queue(maxsize=self.queue_size)
-        result_queue = self.ctx.Queue()
-        self._shutdown_event = self.ctx.Event()
-        shutdown_event = self._shutdown_event
+        if on_success is None and on_success_batch is None:
+            raise ValueError("on_success or on_success_batch is required")
+        self._prepare_run()
+        self._run(
+            generator,
+            on_success,
+            on_error,
+            on_timeout,
+            on_setup_fail,
+            on_task_start,
+            on_exit,
+            base_seed,
+            task_timeout,
+            total_tasks,
+            setup_kwargs,
+            on_success_batch,
+            prefetch,
+        )
 
-        # Signal handler to set shutdown event
-        def signal_handler(signum, frame):
-            shutdown_event.set()
+    def _run(
+        self,
+        generator: Iterable[Any],
+        on_success: SuccessCallback | None,
+        on_error: ErrorCallback | None,
+        on_timeout: TimeoutCallback | None,
+        on_setup_fail: SetupFailCallback | None,
+        on_task_start: StartCallback | None,
+        on_exit: ExitCallback | None,
+        base_seed: int,
+        task_timeout: float | None,
+        total_tasks: int | None,
+        setup_kwargs: dict[str, Any],
+        on_success_batch: SuccessBatchCallback | None = None,
+        prefetch: bool = False,
+    ) -> None:
+        """Body of :meth:`run`, taking the worker setup kwargs as one dict.
+
+        Wrappers such as ``RichDispatcher`` and :meth:`imap` call this so the
+        kwargs are not unpacked and repacked at every layer. They call
+        :meth:`_prepare_run` first.
+        """
+        try:
+            self._start(base_seed, task_timeout, setup_kwargs, emit_started=on_task_start is not None)
+            self._submit(
+                generator,
+                on_success=on_success,
+                on_success_batch=on_success_batch,
+                on_error=on_error,
+                on_timeout=on_timeout,
+                on_setup_fail=on_setup_fail,
+                on_task_start=on_task_start,
+                on_exit=on_exit,
+                total_tasks=total_tasks,
+                prefetch=prefetch,
+            )
+        finally:
+            self.close()
+
+    def _prepare_run(self) -> None:
+        """Refuse a started dispatcher and forget a shutdown() from before this run."""
+        if self._processes:
+            raise RuntimeError("Dispatcher is already started; use submit() until close()")
+        self._shutdown_event.clear()
+
+    def start(
+        self,
+        base_seed: int = 42,
+        task_timeout: float | None = None,
+        **setup_kwargs,
+    ) -> None:
+        """Spawn the workers and run their ``setup()`` once for many :meth:`submit` calls.
+
+        :meth:`run` starts and stops the workers around a single generator.
+        With ``start``/``submit``/``close`` the same workers (and whatever
+        their ``setup()`` loaded) serve several generators in turn. Always
+        pair with :meth:`close`.
+        """
+        if self._processes:
+            raise RuntimeError("Dispatcher is already started")
+        self._shutdown_event.clear()
+        try:
+            self._start(base_seed, task_timeout, setup_kwargs, emit_started=True)
+        except BaseException:
+            # Release whatever was set up before the failure
+            self.close()
+            raise
+
+    def submit(
+        self,
+        generator: Iterable[Any],
+        on_success: SuccessCallback | None = None,
+        on_error: ErrorCallback | None = None,
+        on_timeout: TimeoutCallback | None = None,
+        on_setup_fail: SetupFailCallback | None = None,
+        on_task_start: StartCallback | None = None,
+        on_exit: ExitCallback | None = None,
+        total_tasks: int | None = None,
+        on_success_batch: SuccessBatchCallback | None = None,
+        prefetch: bool = False,
+    ) -> None:
+        """Run every task of ``generator`` on the started workers, like :meth:`run`.
+
+        Blocks until all of its tasks have finished. Task ids start from 0
+        for every submission. If a callback raises, the exception propagates
+        once the submission's remaining tasks are discarded, and the workers
+        stay available for the next submission. After :meth:`shutdown` (or
+        SIGINT/SIGTERM) the workers are stopping and only :meth:`close` is
+        left to call.
+        """
+        if on_success is None and on_success_batch is None:
+            raise ValueError("on_success or on_success_batch is required")
+        if not self._processes:
+            raise RuntimeError("start() must be called before submit()")
+        if self._shutdown_event.is_set():
+            raise RuntimeError("Dispatcher has been shut down; close() it and start() again")
+        if self._submitting:
+            raise RuntimeError("Another submission is still in progress")
+        self._submit(
+            generator,
+            on_success=on_success,
+            on_success_batch=on_success_batch,
+            on_error=on_error,
+            on_timeout=on_timeout,
+            on_setup_fail=on_setup_fail,
+            on_task_start=on_task_start,
+            on_exit=on_exit,
+            total_tasks=total_tasks,
+            prefetch=prefetch,
+        )
 
-        # Register signal handlers only in main thread
-        is_main_thread = threading.current_thread() is threading.main_thread()
-        original_sigint = None
-        original_sigterm = None
-        if is_main_thread:
-            original_sigint = signal.signal(signal.SIGINT, signal_handler)
-            original_sigterm = signal.signal(signal.SIGTERM, signal_handler)
+    def close(self) -> None:
+        """Stop the workers started by :meth:`start` and release their queues."""
+        # Also covers a start() that failed part way
+        if self._control_send is None:
+            return
+
+        if self._original_affinity is not None:
+            os.sched_setaffinity(0, self._original_affinity)
+            self._original_affinity = None
+
+        # Shutdown sequence
+        self.shutdown()
+        self._shutdown_workers(self._processes, self._worker_queues, self._result_conns)
+        task_queues, self._task_queues = self._task_queues, []
+        self._cleanup_queues(task_queues, self._result_conns)
+        control_send, self._control_send = self._control_send, None
+        control_send.close()
+        self._control_recv.close()
+        self._processes = []
+        self._worker_queues = []
+        self._result_conns = []
+        self._live_conns = []
+
+    def _start(
+        self,
+        base_seed: int,
+        task_timeout: float | None,
+        setup_kwargs: dict[str, Any],
+        emit_started: bool,
+    ) -> None:
+        threads = self.backend == "threads"
+        if threads:
+            self._control_recv = self._control_send = LocalConnection()
+        else:
+            self._control_recv, self._control_send = mp.Pipe(duplex=False)
+        shutdown_event = self._shutdown_event
+        task_queues, worker_queues = self._make_task_queues()
+        self._task_queues = task_queues
+        self._worker_queues = worker_queues
+        self._active_workers = len(self.gpu_ids)
+        self._first_task_id = 0
+
+        # The dispatcher thread (and the feeder it starts) get their own
+        # core; each worker gets an even, disjoint slice of the rest
+        worker_cpus = []
+        if self.pin_cpus:
+            self._original_affinity = os.sched_getaffinity(0)
+            cpus = sorted(self._original_affinity)
+            worker_cpus = _split_cpus(cpus[1:] or cpus, len(self.gpu_ids))
 
-        processes = []
         worker_target = _worker_main_silenced if self.suppress_worker_output else _worker_main
-        for gpu_id in self.gpu_ids:
-            worker_instance = self.worker_cls()
+        for index, gpu_id in enumerate(self.gpu_ids):
             seed = base_seed + gpu_id
-
-            p = self.ctx.Process(
-                target=worker_target,
-                args=(
-                    worker_instance,
-                    gpu_id,
-                    seed,
-                    task_queue,
-                    result_queue,
-                    task_timeout,
-                    setup_kwargs,
-                    shutdown_event,
-                ),
+            if threads:
+                result_recv = result_send = LocalConnection()
+            else:
+                result_recv, result_send = self.ctx.Pipe(duplex=False)
+
+            args = (
+                self.worker_cls,
+                gpu_id,
+                seed,
+                worker_queues[index],
+                result_send,
+                task_timeout,
+                setup_kwargs,
+                shutdown_event,
+                self._steal_order(task_queues, index),
+                emit_started,
             )
-            p.start()
-            processes.append(p)
-
-        feeder_stop = threading.Event()
-        task_count = [0]
+            if threads:
+                p = threading.Thread(target=_worker_thread_main, args=args, daemon=True)
+            else:
+                p = self.ctx.Process(target=worker_target, args=args)
+            # Tracked before starting, so close() releases the pipe if the
+            # worker fails to start (e.g. an unpicklable setup kwarg)
+            self._result_conns.append(result_recv)
+            try:
+                p.start()
+            finally:
+                if not threads:
+                    # Drop the parent's copy so the pipe reports EOF if the worker dies
+                    result_send.close()
+            if worker_cpus:
+                # Pinned before setup() runs, so threads the worker starts
+                # (e.g. a framework's intra-op pool) inherit the mask
+                os.sched_setaffinity(p.pid, worker_cpus[index])
+            if self.sched_batch:
+                os.sched_setscheduler(p.pid, os.SCHED_BATCH, os.sched_param(0))
+            self._processes.append(p)
+        # Pipes of workers still running, shrunk by the monitor on EOF
+        self._live_conns = list(self._result_conns)
+
+        if self._original_affinity is not None:
+            os.sched_setaffinity(0, {min(self._original_affinity)})
+
+    def _submit(
+        self,
+        generator: Iterable[Any],
+        on_success: SuccessCallback | None,
+        on_success_batch: SuccessBatchCallback | None,
+        on_error: ErrorCallback | None,
+        on_timeout: TimeoutCallback | None,
+        on_setup_fail: SetupFailCallback | None,
+        on_task_start: StartCallback | None,
+        on_exit: ExitCallback | None,
+        total_tasks: int | None,
+        prefetch: bool,
+    ) -> None:
+        shutdown_event = self._shutdown_event
+        first_id = self._first_task_id
+        stop = self._feeder_stop = threading.Event()
+        task_queues = self._task_queues
+        cursor = itertools.count()
+        batch = _PartialBatch(lambda items: self._put_batch(task_queues, items, stop, cursor), first_id)
         feeder_thread = threading.Thread(
             target=self._feeder,
-            args=(generator, task_queue, feeder_stop, task_count, shutdown_event),
+            args=(generator, batch, stop, prefetch),
             daemon=True,
         )
-        feeder_thread.start()
-
+        self._submitting = True
+        # SIGINT/SIGTERM shut down every submitting dispatcher
+        installed_handlers = register_dispatcher(self)
+        completed = False
         try:
+            feeder_thread.start()
             self._monitor(
-                result_queue=result_queue,
-                feeder_stop=feeder_stop,
-                feeder_thread=feeder_thread,
-                task_count=task_count,
+                result_conns=self._live_conns,
+                control_conn=self._control_recv,
                 on_success=on_success,
+                on_success_batch=on_success_batch,
                 on_error=on_error,
                 on_timeout=on_timeout,
                 on_setup_fail=on_setup_fail,
                 on_task_start=on_task_start,
                 shutdown_event=shutdown_event,
                 total_tasks=total_tasks,
+                first_id=first_id,
             )
+            completed = not shutdown_event.is_set()
         except KeyboardInterrupt:
             shutdown_event.set()
         finally:
-            # Restore signal handlers if we registered them
-            if is_main_thread:
-                signal.signal(signal.SIGINT, original_sigint)
-                signal.signal(signal.SIGTERM, original_sigterm)
-
+            unregister_dispatcher(self, installed_handlers)
+            self._finish_submission(feeder_thread, batch, stop, completed)
+            self._submitting = False
             if on_exit:
                 on_exit()
 
-            # Shutdown sequence
-            shutdown_event.set()
-            feeder_stop.set()
-            self._shutdown_workers(processes, task_queue)
-            self._cleanup_queues(task_queue, result_queue)
+    def _finish_submission(
+        self,
+        feeder_thread: threading.Thread,
+        batch: "_PartialBatch",
+        stop: threading.Event,
+        completed: bool,
+    ) -> None:
+        """Stop the feeder and discard what it left behind for the next submission.
+
+        After a submission that did not complete (a callback raised, or a
+        shutdown), its remaining tasks are dropped from the rings, along with
+        any FeederDone it sent. Tasks the workers already took still report
+        back; the next submission numbers its tasks past them, so the monitor
+        can tell those late results apart and drop them as well.
+
+        The feeder itself is not waited for: it may be blocked in the
+        generator for any length of time. Every put goes through ``batch``
+        under its lock and is refused once ``stop`` is set, so once the lock
+        is taken here an abandoned feeder can no longer touch the rings.
+        """
+        stop.set()
+        # A feeder or flush timer blocked on a full ring (holding the lock)
+        # resumes once the rings are drained
+        while not batch.lock.acquire(timeout=0.01):
+            for task_queue in self._task_queues:
+                self._drain_queue(task_queue)
+        try:
+            batch.close()
+            for task_queue in self._task_queues:
+                self._drain_queue(task_queue)
+            control_recv = self._control_recv
+            while control_recv.poll():
+                if type(control_recv) is LocalConnection:
+                    control_recv.recv()
+                else:
+                    control_recv.recv_bytes()
+            if not completed:
+                self._first_task_id = batch.next_id
+        finally:
+            batch.lock.release()
+        if completed:
+            # The feeder sent FeederDone as its last step and is exiting
+            feeder_thread.join()
+
+    def imap(
+        self,
+        generator: Iterable[Any],
+        base_seed: int = 42,
+        task_timeout: float | None = None,
+        total_tasks: int | None = None,
+        **setup_kwargs,
+    ) -> Iterator[TaskSuccess | TaskError | TaskTimeout]:
+        """Stream task outcomes in completion order instead of using callbacks.
+
+        Runs :meth:`run` on a background thread and yields a ``TaskSuccess``,
+        ``TaskError`` or ``TaskTimeout`` for every task, in the spirit of
+        ``Executor.map``. At most ``queue_size`` outcomes are buffered, so a
+        slow consumer applies backpressure to the workers. Closing the
+        iterator early shuts the dispatcher down. Errors raised by ``run``
+        (e.g. every worker failing setup) are re-raised to the consumer.
+        """
+        outcomes = queue.Queue(maxsize=self.queue_size)
+        failure = []
+
+        def target():
+            try:
+                self._run(
+                    generator,
+                    on_success=lambda task_id, data, worker_id: outcomes.put(TaskSuccess(task_id, data, worker_id)),
+                    on_error=lambda task_id, error, worker_id: outcomes.put(TaskError(task_id, error, worker_id)),
+                    on_timeout=lambda task_id, timeout, worker_id: outcomes.put(TaskTimeout(task_id, timeout, worker_id)),
+                    on_setup_fail=None,
+                    on_task_start=None,
+                    on_exit=None,
+                    base_seed=base_seed,
+                    task_timeout=task_timeout,
+                    total_tasks=total_tasks,
+                    setup_kwargs=setup_kwargs,
+                )
+            except BaseException as e:
+                failure.append(e)
+            finally:
+                outcomes.put(_STREAM_END)
+
+        self._prepare_run()
+        runner = threading.Thread(target=target, daemon=True)
+        runner.start()
+        try:
+            while (outcome := outcomes.get()) is not _STREAM_END:
+                yield outcome
+            if failure:
+                raise failure[0]
+        finally:
+            if runner.is_alive():
+                self.shutdown()
+                # Keep draining so the monitor never blocks on a full buffer
+                while runner.is_alive():
+                    try:
+                        outcomes.get(timeout=0.1)
+                    except Empty:
+                        pass
+            runner.join()
+
+    def _make_task_queues(self) -> tuple[list[SPMCRing], list[SPMCRing]]:
+        """Create the task rings; returns (all rings, ring owned by each worker)."""
+        if self.scheduler == "shared":
+            ring = self._make_ring(self.queue_size)
+            return [ring], [ring] * len(self.gpu_ids)
+        capacity = max(1, self.queue_size // len(self.gpu_ids))
+        rings = [self._make_ring(capacity) for _ in self.gpu_ids]
+        return rings, rings
+
+    def _make_ring(self, capacity: int) -> SPMCRing | LocalRing:
+        if self.backend == "threads":
+            return LocalRing(capacity)
+        return SPMCRing(capacity, ctx=self.ctx, item_format=self.payload_format)
+
+    def _steal_order(self, task_queues: list[SPMCRing], index: int) -> list[SPMCRing]:
+        """Neighbouring rings a worker may steal from, nearest first."""
+        if len(task_queues) == 1:
+            return []
+        return task_queues[index + 1:] + task_queues[:index]
 
     def _feeder(
         self,
         generator: Iterable[Any],
-        task_queue: mp.Queue,
-        stop_event: threading.Event,
-        task_count: list,
-        shutdown_event,
+        batch: "_PartialBatch",
+        stop: threading.Event,
+        prefetch: bool = False,
     ) -> None:
-        task_id = 0
+        first_id = batch.next_id
+        # Bind hot-loop globals and attributes to locals
+        is_shutdown = stop.is_set
+        batch_size = self.batch_size
+        lock = batch.lock
+        timer = None
         try:
+            if prefetch:
+                generator = list(generator)
+            if isinstance(generator, (list, tuple)):
+                # Every item is already available: cut whole batches by
+                # slicing instead of timing each pull
+                for start in range(0, len(generator), batch_size):
+                    if is_shutdown():
+                        break
+                    with lock:
+                        batch.items = list(enumerate(generator[start:start + batch_size], first_id + start))
+                        batch.next_id = first_id + start + len(batch.items)
+                        if not batch.flush():
+                            break
+                return
+            if batch_size > 1:
+                # Partial batches are handed off by a timer thread rather
+                # than when the next item arrives, so none waits on a
+                # generator that is slow to produce it
+                timer = threading.Thread(target=batch.run_timer, daemon=True)
+                timer.start()
             for data in generator:
-                if shutdown_event.is_set():
+                if is_shutdown():
                     break
-                # Use timeout to allow checking shutdown_event
-                while not shutdown_event.is_set():
-                    try:
-                        task_queue.put((task_id, data), timeout=0.5)
+                with lock:
+                    items = batch.items
+                    if not items and timer is not None:
+                        batch.open()
+                    items.append((batch.next_id, data))
+                    batch.next_id += 1
+                    if len(items) >= batch_size and not batch.flush():
                         break
-                    except Full:
-                        continue
-                if shutdown_event.is_set():
-                    break
-                task_id += 1
         except Exception as e:
             # If generator fails, log and stop
             print(f"Feeder thread error: {e}")
         finally:
-            task_count[0] = task_id
-            stop_event.set()
+            with lock:
+                if batch.items:
+                    batch.flush()
+                batch.close()
+            if timer is not None:
+                timer.join()
+            # A stopped submission is over and no longer waits for the total.
+            # Checked under the lock _finish_submission takes after stopping,
+            # so a FeederDone is either sent before it drains the control
+            # pipe or not at all.
+            with lock:
+                if not stop.is_set():
+                    self._send_control([FeederDone(total=batch.sent - first_id)])
+
+    def _put_batch(
+        self,
+        task_queues: list[SPMCRing],
+        batch: list,
+        stop: threading.Event,
+        cursor: Iterator[int],
+    ) -> bool:
+        """Put one batch, retrying until it fits. Returns False once ``stop`` is set."""
+        if stop.is_set():
+            return False
+        queue = task_queues[0]
+        # Serialized once, however many rings are tried
+        encoded = queue.encode(batch)
+        if len(task_queues) > 1:
+            # Round-robin, skipping rings that are currently full
+            start = next(cursor) % len(task_queues)
+            order = [(start + offset) % len(task_queues) for offset in range(len(task_queues))]
+            if self.scheduler == "least_loaded":
+                # Shallowest ring first; the rotating start spreads ties
+                order.sort(key=lambda i: task_queues[i].qsize())
+            for i in order:
+                try:
+                    task_queues[i].put_encoded(encoded, timeout=0)
+                    return True
+                except Full:
+                    continue
+            queue = task_queues[order[0]]
+
+        # Block until there is room; shutdown() cancels the wait
+        if stop.is_set():
+            return False
+        try:
+            queue.put_encoded(encoded)
+        except Full:
+            return False
+        return True
 
-    def _drain_queue(self, queue: mp.Queue) -> None:
+    def _drain_queue(self, queue: Any) -> None:
         """Drain remaining items from queue to allow clean shutdown."""
         try:
             while True:
@@ -202,18 +730,39 @@ class Dispatcher:
         except Empty:
             pass
 
-    def _shutdown_workers(self, processes: list, task_queue: mp.Queue) -> None:
+    def _shutdown_workers(
+        self,
+        processes: list,
+        worker_queues: list[SPMCRing],
+        result_conns: list[Connection],
+    ) -> None:
         """Shutdown worker processes with escalating force (graceful → terminate → kill)."""
-        # Send stop sentinels
-        for _ in self.gpu_ids:
-            try:
-                task_queue.put(None, timeout=0.5)
-            except Full:
-                pass
-
-        # Wait for graceful exit
+        # Idle workers block on their ring; wake each one so its get()
+        # returns the None stop marker. Unlike a sentinel item this needs
+        # no free slot, so a full ring cannot delay shutdown.
+        for task_queue in worker_queues:
+            task_queue.wake()
+
+        # Wait for graceful exit, discarding late results so no worker
+        # blocks on a full result pipe
+        open_conns = list(result_conns)
+        deadline = time.monotonic() + 3.0
+        while open_conns and time.monotonic() < deadline:
+            for conn in wait(open_conns, timeout=0.1):
+                try:
+                    if type(conn) is LocalConnection:
+                        conn.recv()
+                    else:
+                        conn.recv_bytes()
+                except EOFError:
+                    open_conns.remove(conn)
         for p in processes:
-            p.join(timeout=3.0)
+            p.join(timeout=max(0.0, deadline - time.monotonic()))
+
+        # Threads cannot be terminated; a stuck (daemon) worker thread is
+        # left behind and ends with the interpreter
+        if self.backend == "threads":
+            return
 
         # Terminate stragglers
         for p in processes:
@@ -227,69 +776,239 @@ class Dispatcher:
                 p.kill()
                 p.join(timeout=0.5)
 
-    def _cleanup_queues(self, task_queue: mp.Queue, result_queue: mp.Queue) -> None:
-        """Drain and close queues to prevent resource warnings."""
-        self._drain_queue(task_queue)
-        self._drain_queue(result_queue)
-        task_queue.close()
-        result_queue.close()
-        task_queue.join_thread()
-        result_queue.join_thread()
+    def _cleanup_queues(self, task_queues: list[SPMCRing], result_conns: list[Connection]) -> None:
+        """Drain and close queues and pipes to prevent resource warnings."""
+        for task_queue in task_queues:
+            self._drain_queue(task_queue)
+            task_queue.close()
+        for conn in result_conns:
+            conn.close()
 
     def _monitor(
         self,
-        result_queue: mp.Queue,
-        feeder_stop: threading.Event,
-        feeder_thread: threading.Thread,
-        task_count: list,
-        on_success: SuccessCallback,
+        result_conns: list[Connection],
+        control_conn: Connection,
+        on_success: SuccessCallback | None,
+        on_success_batch: SuccessBatchCallback | None,
         on_error: ErrorCallback | None,
         on_timeout: TimeoutCallback | None,
         on_setup_fail: SetupFailCallback | None,
         on_task_start: StartCallback | None,
         shutdown_event,
         total_tasks: int | None,
+        first_id: int = 0,
     ) -> None:
-        active_workers = len(self.gpu_ids)
         results_received = 0
+        expected = None
+        # Completions of an aborted earlier submission's tasks, not counted
+        stale = 0
+
+        def handle_feeder_done(total: int) -> None:
+            nonlocal expected
+            expected = total
+
+        def handle_setup_fail(gpu_id: int, error: str) -> None:
+            if on_setup_fail:
+                on_setup_fail(gpu_id, error)
+            # Counted on the dispatcher, as a session's workers report
+            # setup failures only once across submissions
+            self._active_workers -= 1
+            if self._active_workers == 0:
+                raise RuntimeError("All workers failed during setup")
+
+        # Handlers indexed by message kind, called with the message fields
+        # straight from the encoded (kind, *fields) tuple. The user callbacks
+        # take the fields in protocol order, so they are used as they are
+        # instead of decoding each message into its dataclass first.
+        handlers = [None] * len(_MESSAGE_TYPES)
+        handlers[TaskSuccess.kind] = on_success or _ignore
+        # Successes for on_success_batch, delivered once per wake-up
+        successes = []
+        if on_success_batch is not None:
+            on_each = handlers[TaskSuccess.kind]
+
+            def handle_success(task_id: int, data: Any, worker_id: int) -> None:
+                on_each(task_id, data, worker_id)
+                successes.append((task_id, data, worker_id))
+
+            handlers[TaskSuccess.kind] = handle_success
+        handlers[TaskError.kind] = on_error or _ignore
+        handlers[TaskTimeout.kind] = on_timeout or _ignore
+        handlers[TaskStarted.kind] = on_task_start or _ignore
+        handlers[SetupFailed.kind] = handle_setup_fail
+        handlers[CleanupFailed.kind] = lambda gpu_id, error: print(f"Warning: Cleanup failed for GPU {gpu_id}: {error}")
+        handlers[FeederDone.kind] = handle_feeder_done
+        if first_id:
+            # Ids below first_id belong to an aborted earlier submission;
+            # the rest are shifted back so every submission starts from 0
+            def skip_stale(handler: Callable, completes: int) -> Callable:
+                def handle(task_id: int, *fields: Any) -> None:
+                    nonlocal stale
+                    if task_id >= first_id:
+                        handler(task_id - first_id, *fields)
+                    else:
+                        stale += completes
+
+                return handle
+
+            for cls in (TaskSuccess, TaskError, TaskTimeout, TaskStarted):
+                handlers[cls.kind] = skip_stale(handlers[cls.kind], _COMPLETES_TASK[cls.kind])
+        # Bind hot-loop globals to locals
+        completes_task = _COMPLETES_TASK
+        loads = pickle.loads
+        local = self.backend == "threads"
+        # Result batches are read into one reusable buffer instead of a
+        # fresh bytes object per message
+        buffer = bytearray(_RECV_BUFFER_SIZE)
+        view = memoryview(buffer)
 
         while True:
             # Check for shutdown signal
             if shutdown_event.is_set():
                 break
 
-            if feeder_stop.is_set() and results_received >= task_count[0]:
+            if expected is not None and results_received - stale >= expected:
                 break
 
-            try:
-                result = result_queue.get(timeout=0.1)
-            except Empty:
-                continue
-            if isinstance(result, TaskStarted):
-                if on_task_start:
-                    on_task_start(result.task_id, result.worker_id)
-                continue
-
-            if isinstance(result, TaskSuccess):
-                on_success(result.task_id, result.data, result.worker_id)
-                results_received += 1
-
-            elif isinstance(result, TaskError):
-                if on_error:
-                    on_error(result.task_id, result.error, result.worker_id)
-                results_received += 1
-
-            elif isinstance(result, TaskTimeout):
-                if on_timeout:
-                    on_timeout(result.task_id, result.timeout, result.worker_id)
-                results_received += 1
-
-            elif isinstance(result, SetupFailed):
-                if on_setup_fail:
-                    on_setup_fail(result.gpu_id, result.error)
-                active_workers -= 1
-                if active_workers == 0:
-                    raise RuntimeError("All workers failed during setup")
-
-            elif isinstance(result, CleanupFailed):
-                print(f"Warning: Cleanup failed for GPU {result.gpu_id}: {result.error}")
+            if not result_conns:
+                raise RuntimeError("All workers exited before finishing their tasks")
+
+            # Block until a worker reports or the feeder/shutdown sends a control message
+            for conn in wait(result_conns + [control_conn]):
+                # Drain the batches already queued on this pipe before going
+                # back to wait(), which rebuilds its poll set on every call;
+                # capped so one busy worker cannot starve the others
+                for _ in range(_MAX_DRAIN):
+                    try:
+                        if local:
+                            # Thread workers pass their batches by reference
+                            batch = conn.recv()
+                        else:
+                            size = conn.recv_bytes_into(buffer)
+                            batch = loads(view[:size])
+                    except EOFError:
+                        # Worker exited; its pipe will never deliver again
+                        result_conns.remove(conn)
+                        break
+                    except BufferTooShort as e:
+                        # The message was still read; keep a buffer that fits it
+                        data = e.args[0]
+                        view.release()
+                        buffer = bytearray(2 * len(data))
+                        view = memoryview(buffer)
+                        batch = loads(data)
+
+                    for encoded in batch:
+                        kind = encoded[0]
+                        handlers[kind](*encoded[1:])
+                        results_received += completes_task[kind]
+
+                    if not conn.poll():
+                        break
+
+                if successes:
+                    delivered = successes.copy()
+                    successes.clear()
+                    on_success_batch(delivered)
+
+
+class _PartialBatch:
+    """The feeder's batch under construction, shared with its flush timer.
+
+    :meth:`run_timer` hands the batch off once it has been open for
+    ``_BATCH_FLUSH_INTERVAL``, even while the feeder is blocked in the
+    generator. ``lock`` keeps the feeder's and the timer's puts apart, so
+    every ring still has a single producer at a time.
+    """
+
+    def __init__(self, put: Callable[[list], bool], first_id: int = 0) -> None:
+        self.put = put
+        self.items = []
+        self.next_id = first_id
+        self.sent = first_id
+        self.stopped = False
+        self.lock = threading.Lock()
+        self._opened_at = 0.0
+        self._changed = threading.Condition(self.lock)
+
+    def open(self) -> None:
+        """Start the flush clock for a new batch; call with ``lock`` held."""
+        self._opened_at = time.monotonic()
+        self._changed.notify()
+
+    def close(self) -> None:
+        """Stop the flush timer; call with ``lock`` held."""
+        self.stopped = True
+        self._changed.notify()
+
+    def flush(self) -> bool:
+        """Put the open batch; call with ``lock`` held. Returns False on shutdown."""
+        items, self.items = self.items, []
+        if not self.put(items):
+            self.stopped = True
+            return False
+        self.sent = self.next_id
+        return True
+
+    def run_timer(self) -> None:
+        with self._changed:
+            while not self.stopped:
+                if not self.items:
+                    self._changed.wait()
+                    continue
+                remaining = self._opened_at + _BATCH_FLUSH_INTERVAL - time.monotonic()
+                if remaining > 0:
+                    self._changed.wait(remaining)
+                else:
+                    self.flush()
+
+
+def _ignore(*fields: Any) -> None:
+    pass
+
+
+def _split_cpus(cpus: list[int], count: int) -> list[set[int]]:
+    """Split ``cpus`` into ``count`` even, contiguous slices.
+
+    With fewer CPUs than slices, CPUs are handed out round-robin and shared.
+    """
+    if len(cpus) < count:
+        return [{cpus[i % len(cpus)]} for i in range(count)]
+    size, extra = divmod(len(cpus), count)
+    slices = []
+    start = 0
+    for i in range(count):
+        end = start + size + (i < extra)
+        slices.append(set(cpus[start:end]))
+        start = end
+    return slices
+
+
+def _handle_shutdown_signal(signum, frame) -> None:
+    for dispatcher in list(_active_dispatchers):
+        dispatcher.shutdown()
+
+
+def register_dispatcher(dispatcher: Dispatcher) -> bool:
+    """Track a running dispatcher; returns True if this call installed the handlers."""
+    global _original_handlers
+    with _signal_lock:
+        _active_dispatchers.append(dispatcher)
+        if _original_handlers is not None or threading.current_thread() is not threading.main_thread():
+            return False
+        _original_handlers = {
+            signum: signal.signal(signum, _handle_shutdown_signal)
+            for signum in (signal.SIGINT, signal.SIGTERM)
+        }
+        return True
+
+
+def unregister_dispatcher(dispatcher: Dispatcher, installed_handlers: bool) -> None:
+    """Stop tracking a dispatcher, restoring the handlers if it installed them."""
+    global _original_handlers
+    with _signal_lock:
+        _active_dispatchers.remove(dispatcher)
+        if installed_handlers:
+            for signum, handler in _original_handlers.items():
+                signal.signal(signum, handler)
+            _original_handlers = None
@@ -0,0 +1,138 @@
+import os
+import threading
+from collections import deque
+from queue import Empty, Full
+from typing import Any
+
+# Marks the end of a LocalConnection's stream, like EOF on a closed pipe
+_EOF = object()
+
+
+class LocalRing:
+    """In-process counterpart of :class:`~gpu_dispatch.ring.SPMCRing`.
+
+    Used by the ``"threads"`` backend, where workers share the dispatcher's
+    address space: batches are handed over by reference through a bounded
+    deque instead of being pickled into shared memory. Implements the same
+    ``put``/``put_encoded``/``get``/``cancel_put``/``wake``/``qsize``
+    semantics.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._items = deque()
+        self._wakeups = 0
+        self._cancelled = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+    def put(self, obj: Any, timeout: float | None = None) -> None:
+        """Append ``obj``; raises ``Full`` on timeout or :meth:`cancel_put`."""
+        with self._not_full:
+            if not self._not_full.wait_for(lambda: len(self._items) < self.capacity or self._cancelled, timeout):
+                raise Full
+            if self._cancelled:
+                self._cancelled = False
+                raise Full
+            self._items.append(obj)
+            self._not_empty.notify()
+
+    def put_nowait(self, obj: Any) -> None:
+        self.put(obj, timeout=0)
+
+    def encode(self, obj: Any) -> Any:
+        # Items are passed by reference, so there is nothing to serialize
+        return obj
+
+    put_encoded = put
+
+    def cancel_put(self) -> None:
+        """Make the producer's current (or next) ``put`` raise ``Full``."""
+        with self._not_full:
+            self._cancelled = True
+            self._not_full.notify_all()
+
+    def wake(self) -> None:
+        """Make one blocked (or the next) ``get`` on an empty ring return ``None``."""
+        with self._not_empty:
+            self._wakeups += 1
+            self._not_empty.notify()
+
+    def get(self, timeout: float | None = None) -> Any:
+        """Pop the oldest item, or ``None`` for a :meth:`wake` permit."""
+        with self._not_empty:
+            if not self._not_empty.wait_for(lambda: self._items or self._wakeups, timeout):
+                raise Empty
+            if self._items:
+                obj = self._items.popleft()
+                self._not_full.notify()
+                return obj
+            self._wakeups -= 1
+            return None
+
+    def get_nowait(self) -> Any:
+        return self.get(timeout=0)
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def close(self) -> None:
+        pass
+
+
+class LocalConnection:
+    """One-way channel of message batches between threads.
+
+    Batches are passed by reference through a deque; each one also writes a
+    byte to an OS pipe, so the receiving side can be waited on together
+    with real ``multiprocessing`` connections via ``connection.wait``.
+    :meth:`close_send` ends the stream, after which :meth:`recv` raises
+    ``EOFError`` like a pipe whose writer has exited.
+    """
+
+    def __init__(self) -> None:
+        self._batches = deque()
+        self._read_fd, self._write_fd = os.pipe()
+        self._closed = False
+        # Keeps a late write (send() or recv() re-signalling EOF) off a
+        # descriptor close() released
+        self._lock = threading.Lock()
+
+    def fileno(self) -> int:
+        return self._read_fd
+
+    def send(self, batch: list) -> None:
+        """Hand ``batch`` to the receiver; the caller must not reuse it."""
+        with self._lock:
+            if self._closed:
+                return
+            self._batches.append(batch)
+            os.write(self._write_fd, b"\0")
+
+    def close_send(self) -> None:
+        self.send(_EOF)
+
+    def recv(self) -> list:
+        os.read(self._read_fd, 1)
+        batch = self._batches.popleft()
+        if batch is _EOF:
+            # Keep reporting EOF to later reads
+            with self._lock:
+                if not self._closed:
+                    self._batches.appendleft(_EOF)
+                    os.write(self._write_fd, b"\0")
+            raise EOFError
+        return batch
+
+    def poll(self) -> bool:
+        return bool(self._batches)
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                os.close(self._read_fd)
+                os.close(self._write_fd)
@@ -1,8 +1,9 @@
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, ClassVar, final
 
 
-@dataclass
+@final
+@dataclass(slots=True, frozen=True)
 class TaskSuccess:
     """Successful task completion.
 
@@ -11,12 +12,14 @@ class TaskSuccess:
         data: The return value from worker.process().
         worker_id: The GPU/worker identifier that processed the task.
     """
+    kind: ClassVar[int] = 0
     task_id: int
     data: Any
     worker_id: int
 
 
-@dataclass
+@final
+@dataclass(slots=True, frozen=True)
 class TaskError:
     """Task execution failure.
 
@@ -25,12 +28,14 @@ class TaskError:
         error: Traceback string describing the runtime error.
         worker_id: The GPU/worker identifier that processed the task.
     """
+    kind: ClassVar[int] = 1
     task_id: int
     error: str
     worker_id: int
 
 
-@dataclass
+@final
+@dataclass(slots=True, frozen=True)
 class TaskTimeout:
     """Task execution timeout.
 
@@ -39,20 +44,23 @@ class TaskTimeout:
         timeout: The timeout duration (in seconds) that was exceeded.
         worker_id: The GPU/worker identifier that was executing the task.
     """
+    kind: ClassVar[int] = 2
     task_id: int
     timeout: float
     worker_id: int
 
 
-@dataclass
+@final
+@dataclass(slots=True, frozen=True)
 class TaskStarted:
     """Notification that a worker has started processing a task."""
-
+    kind: ClassVar[int] = 3
     task_id: int
     worker_id: int
 
 
-@dataclass
+@final
+@dataclass(slots=True, frozen=True)
 class SetupFailed:
     """Worker initialization failure.
 
@@ -60,11 +68,13 @@ class SetupFailed:
         gpu_id: The GPU ID assigned to the failed worker.
         error: Traceback string describing the initialization error.
     """
+    kind: ClassVar[int] = 4
     gpu_id: int
     error: str
 
 
-@dataclass
+@final
+@dataclass(slots=True, frozen=True)
 class CleanupFailed:
     """Worker cleanup failure.
 
@@ -72,5 +82,23 @@ class CleanupFailed:
         gpu_id: The GPU ID assigned to the worker.
         error: Traceback string describing the cleanup error.
     """
+    kind: ClassVar[int] = 5
     gpu_id: int
     error: str
+
+
+@final
+@dataclass(slots=True, frozen=True)
+class FeederDone:
+    """Internal marker: the feeder has handed off every task it will produce.
+
+    Attributes:
+        total: Number of tasks that were put on the task rings.
+    """
+    kind: ClassVar[int] = 6
+    total: int
+
+
+# Message classes indexed by their ``kind`` tag. The classes are final:
+# a subclass would inherit its parent's kind and decode as the parent.
+_MESSAGE_TYPES = (TaskSuccess, TaskError, TaskTimeout, TaskStarted, SetupFailed, CleanupFailed, FeederDone)
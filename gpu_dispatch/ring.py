@@ -0,0 +1,276 @@
+import multiprocessing as mp
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from queue import Empty, Full
+from typing import Any
+
+from gpu_dispatch.serialization import dumps, frames_size, loads
+
+# Slot layout: a uint32 length header followed by the serialized frames.
+# A payload that does not fit in one slot runs on into the following ones
+# (wrapping around the end of the ring), so it takes as many free slots as
+# it needs. Only payloads larger than the whole ring are spilled to a
+# dedicated segment whose name is stored in the slot instead (flagged by
+# the high bit).
+# Batches packed with the ring's item format skip pickle entirely and are
+# flagged by the next bit.
+_LEN = struct.Struct("<I")
+_SPILL_FLAG = 0x80000000
+_PACKED_FLAG = 0x40000000
+_LEN_MASK = 0x3FFFFFFF
+# Ring header: head and tail counters, each on its own cache line.
+_HEAD_OFFSET = 0
+_TAIL_OFFSET = 64
+_HEADER_SIZE = 128
+_COUNTER = struct.Struct("<Q")
+
+
+class SPMCRing:
+    """Single-producer multi-consumer ring of pickled slots in shared memory.
+
+    Exposes the subset of the ``mp.Queue`` interface used by the dispatcher
+    (``put``/``get``/``get_nowait``/``close``), but hands items over through
+    a ``multiprocessing.shared_memory`` buffer instead of a pipe, so there is
+    no background feeder thread and no per-item pipe write.
+
+    Python has no portable atomic CAS on shared memory, so consumers claim
+    the head slot under a single lock; the producer owns the tail and never
+    takes that lock. Two semaphores count filled items and free slots and
+    provide the blocking/backpressure semantics.
+
+    With ``item_format`` set (a :mod:`struct` code such as ``"q"``), a list
+    of ``(int, value)`` pairs whose values pack with that code is stored as
+    raw structs and comes back as a list of tuples, without pickling. Any
+    other object falls back to the pickled path.
+    """
+
+    def __init__(self, capacity: int, slot_size: int = 1024, ctx=None, item_format: str | None = None) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if slot_size <= _LEN.size:
+            raise ValueError(f"slot_size must be larger than {_LEN.size} bytes")
+
+        ctx = ctx or mp.get_context()
+        self.capacity = capacity
+        self.slot_size = slot_size
+        self.item_format = item_format
+        self._shm = shared_memory.SharedMemory(create=True, size=_HEADER_SIZE + capacity * slot_size)
+        self._owner = True
+        self._items = ctx.Semaphore(0)
+        self._slots = ctx.Semaphore(capacity)
+        self._head_lock = ctx.Lock()
+        self._init_producer()
+        _COUNTER.pack_into(self._shm.buf, _HEAD_OFFSET, 0)
+        _COUNTER.pack_into(self._shm.buf, _TAIL_OFFSET, 0)
+
+    def __getstate__(self):
+        return (
+            self._shm.name,
+            self.capacity,
+            self.slot_size,
+            self.item_format,
+            self._items,
+            self._slots,
+            self._head_lock,
+        )
+
+    def __setstate__(self, state):
+        name, self.capacity, self.slot_size, self.item_format, self._items, self._slots, self._head_lock = state
+        self._shm = shared_memory.SharedMemory(name=name)
+        self._owner = False
+        self._init_producer()
+
+    def _init_producer(self) -> None:
+        self._cancelled = False
+        self._cancel_lock = threading.Lock()
+        try:
+            self._packer = struct.Struct("<q" + self.item_format) if self.item_format else None
+        except struct.error as e:
+            raise ValueError(f"invalid item_format {self.item_format!r}: {e}") from None
+
+    def encode(self, obj: Any) -> tuple[list, int, int]:
+        """Serialize ``obj`` for :meth:`put_encoded`.
+
+        Returns the frames, the slot header flags and the payload size. The
+        result can be put into any ring with the same ``item_format``, so a
+        producer retrying a put (or trying several rings) encodes only once.
+        """
+        if self._packer is not None and type(obj) is list:
+            pack = self._packer.pack
+            try:
+                frames = [b"".join([pack(*item) for item in obj])]
+                return frames, _PACKED_FLAG, len(frames[0])
+            except (struct.error, TypeError):
+                pass
+        frames = dumps(obj)
+        return frames, 0, frames_size(frames)
+
+    def put(self, obj: Any, timeout: float | None = None) -> None:
+        """Write ``obj`` into the next free slots. Only one process may put.
+
+        Raises ``Full`` if no room frees up within ``timeout`` or if
+        :meth:`cancel_put` interrupts the wait.
+        """
+        self.put_encoded(self.encode(obj), timeout)
+
+    def put_encoded(self, encoded: tuple[list, int, int], timeout: float | None = None) -> None:
+        """Like :meth:`put`, for an object already serialized by :meth:`encode`."""
+        frames, flags, size = encoded
+        slots = self._slots_for(size)
+        if slots > self.capacity:
+            slots = 1
+        self._acquire_slots(slots, timeout)
+        buf = self._shm.buf
+        tail = _COUNTER.unpack_from(buf, _TAIL_OFFSET)[0]
+        slot = tail % self.capacity
+        if slots == 1 and size > self.slot_size - _LEN.size:
+            spill = shared_memory.SharedMemory(create=True, size=_LEN.size + size)
+            _LEN.pack_into(spill.buf, 0, size)
+            _write_frames(spill.buf, _LEN.size, frames)
+            name = spill.name.encode()
+            spill.close()
+            flags |= _SPILL_FLAG
+            frames = [name]
+            size = len(name)
+        _LEN.pack_into(buf, _HEADER_SIZE + slot * self.slot_size, flags | size)
+        self._write(slot, frames)
+        _COUNTER.pack_into(buf, _TAIL_OFFSET, tail + slots)
+        self._items.release()
+
+    def _slots_for(self, size: int) -> int:
+        """Number of consecutive slots a payload of ``size`` bytes occupies."""
+        return -(-(_LEN.size + size) // self.slot_size)
+
+    def _acquire_slots(self, count: int, timeout: float | None) -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for taken in range(count):
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self._slots.acquire(timeout=remaining):
+                self._release_slots(taken)
+                raise Full
+            if self._cancelled:
+                # One of the permits taken may be the cancel permit; giving
+                # back all but one keeps the count of free slots consistent
+                # either way, since nothing is written.
+                with self._cancel_lock:
+                    self._cancelled = False
+                self._release_slots(taken)
+                raise Full
+
+    def _release_slots(self, count: int) -> None:
+        for _ in range(count):
+            self._slots.release()
+
+    def _write(self, slot: int, frames: list) -> None:
+        """Write ``frames`` after the header of ``slot``, wrapping around the ring."""
+        buf = self._shm.buf
+        area = self.capacity * self.slot_size
+        position = slot * self.slot_size + _LEN.size
+        for frame in frames:
+            frame = memoryview(frame).cast("B")
+            while frame.nbytes:
+                chunk = min(frame.nbytes, area - position)
+                start = _HEADER_SIZE + position
+                buf[start:start + chunk] = frame[:chunk]
+                frame = frame[chunk:]
+                position = (position + chunk) % area
+
+    def _read(self, slot: int, size: int) -> bytearray:
+        """Copy the ``size`` bytes after the header of ``slot``, wrapping around the ring."""
+        buf = self._shm.buf
+        area = self.capacity * self.slot_size
+        position = slot * self.slot_size + _LEN.size
+        start = _HEADER_SIZE + position
+        if position + size <= area:
+            return bytearray(buf[start:start + size])
+        chunk = area - position
+        payload = bytearray(buf[start:start + chunk])
+        payload += buf[_HEADER_SIZE:_HEADER_SIZE + size - chunk]
+        return payload
+
+    def put_nowait(self, obj: Any) -> None:
+        self.put(obj, timeout=0)
+
+    def cancel_put(self) -> None:
+        """Make the producer's current (or next) ``put`` raise ``Full``.
+
+        Lets another thread of the producing process abort a ``put`` that is
+        blocked on a full ring without the producer having to poll.
+        """
+        with self._cancel_lock:
+            if not self._cancelled:
+                self._cancelled = True
+                self._slots.release()
+
+    def wake(self) -> None:
+        """Make one blocked (or the next) ``get`` return ``None``.
+
+        Unlike putting a ``None`` sentinel this needs no free slot, so it
+        never blocks or fails on a full ring: it only releases an item
+        permit without publishing an item.
+        """
+        self._items.release()
+
+    def get(self, timeout: float | None = None) -> Any:
+        """Claim the oldest item and return its unpickled payload.
+
+        Returns ``None`` for a permit released by :meth:`wake`.
+        """
+        if not self._items.acquire(timeout=timeout):
+            raise Empty
+        buf = self._shm.buf
+        with self._head_lock:
+            head = _COUNTER.unpack_from(buf, _HEAD_OFFSET)[0]
+            if head == _COUNTER.unpack_from(buf, _TAIL_OFFSET)[0]:
+                # More permits than items: this one came from wake()
+                return None
+            slot = head % self.capacity
+            length = _LEN.unpack_from(buf, _HEADER_SIZE + slot * self.slot_size)[0]
+            size = length & _LEN_MASK
+            payload = self._read(slot, size)
+            slots = self._slots_for(size)
+            _COUNTER.pack_into(buf, _HEAD_OFFSET, head + slots)
+        self._release_slots(slots)
+        if length & _SPILL_FLAG:
+            payload = _read_spill(payload.decode())
+        if length & _PACKED_FLAG:
+            return list(self._packer.iter_unpack(payload))
+        return loads(payload)
+
+    def get_nowait(self) -> Any:
+        return self.get(timeout=0)
+
+    def qsize(self) -> int:
+        """Approximate number of filled slots, read without taking any lock.
+
+        An item larger than a slot counts once for every slot it spans.
+        """
+        buf = self._shm.buf
+        tail = _COUNTER.unpack_from(buf, _TAIL_OFFSET)[0]
+        head = _COUNTER.unpack_from(buf, _HEAD_OFFSET)[0]
+        return max(0, tail - head)
+
+    def close(self) -> None:
+        """Detach from the ring; the creating process also unlinks it."""
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+def _write_frames(buf: memoryview, offset: int, frames: list) -> None:
+    for frame in frames:
+        frame = memoryview(frame).cast("B")
+        buf[offset:offset + frame.nbytes] = frame
+        offset += frame.nbytes
+
+
+def _read_spill(name: str) -> bytearray:
+    spill = shared_memory.SharedMemory(name=name)
+    try:
+        length = _LEN.unpack_from(spill.buf, 0)[0]
+        return bytearray(spill.buf[_LEN.size:_LEN.size + length])
+    finally:
+        spill.close()
+        spill.unlink()
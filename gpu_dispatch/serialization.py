@@ -0,0 +1,67 @@
+import pickle
+import struct
+from dataclasses import fields
+from typing import Any
+
+from gpu_dispatch.protocol import _MESSAGE_TYPES
+
+# Frame header: number of out-of-band buffers, then the byte length of the
+# main pickle stream and of every buffer, all little-endian.
+_COUNT = struct.Struct("<I")
+_SIZE = struct.Struct("<Q")
+
+# Protocol messages travel as plain tuples ``(kind, *fields)``: a tuple of
+# primitives pickles without the module/class lookup and field-name dict a
+# dataclass instance costs, e.g. ~20 bytes instead of ~100 for TaskSuccess.
+_MESSAGE_FIELDS = tuple(tuple(f.name for f in fields(cls)) for cls in _MESSAGE_TYPES)
+
+
+def dumps(obj: Any) -> list:
+    """Serialize ``obj`` into a list of frames using pickle protocol 5.
+
+    Objects that support out-of-band pickling (e.g. numpy arrays wrapped in
+    ``PickleBuffer``) are returned as separate frames referencing their
+    original memory instead of being copied into the pickle stream.
+    """
+    buffers = []
+    main = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    raws = [buffer.raw() for buffer in buffers]
+    header = [_COUNT.pack(len(raws)), _SIZE.pack(len(main))]
+    header.extend(_SIZE.pack(raw.nbytes) for raw in raws)
+    return [b"".join(header), main, *raws]
+
+
+def frames_size(frames: list) -> int:
+    """Total number of bytes in ``frames``."""
+    return sum(memoryview(frame).nbytes for frame in frames)
+
+
+def loads(data: bytearray) -> Any:
+    """Inverse of :func:`dumps` for the concatenated frames in ``data``.
+
+    Out-of-band buffers are reconstructed as views into ``data``, so pass a
+    private, writable copy (a ``bytearray``) rather than shared memory.
+    """
+    view = memoryview(data)
+    count = _COUNT.unpack_from(view, 0)[0]
+    offset = _COUNT.size
+    sizes = [_SIZE.unpack_from(view, offset + i * _SIZE.size)[0] for i in range(count + 1)]
+    offset += (count + 1) * _SIZE.size
+    main = view[offset:offset + sizes[0]]
+    offset += sizes[0]
+    buffers = []
+    for size in sizes[1:]:
+        buffers.append(view[offset:offset + size])
+        offset += size
+    return pickle.loads(main, buffers=buffers)
+
+
+def encode_message(message: Any) -> tuple:
+    """Flatten a protocol message into its compact ``(kind, *fields)`` form."""
+    kind = message.kind
+    return (kind, *(getattr(message, name) for name in _MESSAGE_FIELDS[kind]))
+
+
+def decode_message(encoded: tuple) -> Any:
+    """Rebuild the protocol message produced by :func:`encode_message`."""
+    return _MESSAGE_TYPES[encoded[0]](*encoded[1:])
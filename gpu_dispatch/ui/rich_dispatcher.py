@@ -1,20 +1,22 @@
 from __future__ import annotations
 
-import signal
 import threading
 import time
-from copy import deepcopy
-from typing import Any, Callable, Iterable
+from collections import deque
+from functools import lru_cache, partial
+from typing import TYPE_CHECKING, Any, Callable, Iterable
 
-from rich.console import Console, Group
-from rich.live import Live
-from rich.panel import Panel
-from rich.table import Table
-from rich.text import Text
-
-from gpu_dispatch.dispatcher import Dispatcher
+from gpu_dispatch.dispatcher import Dispatcher, register_dispatcher, unregister_dispatcher
 from gpu_dispatch.worker import BaseWorker
 
+# Rich is imported where a frame is built, so show_ui=False runs never
+# pay for importing it
+if TYPE_CHECKING:
+    from rich.console import Console
+    from rich.panel import Panel
+    from rich.table import Table
+    from rich.text import Text
+
 SuccessCallback = Callable[[int, Any, int], None]
 ErrorCallback = Callable[[int, str, int], None]
 TimeoutCallback = Callable[[int, float, int], None]
@@ -22,6 +24,25 @@ SetupFailCallback = Callable[[int, str], None]
 StartCallback = Callable[[int, int], None]
 ExitCallback = Callable[[], None]
 
+# Kinds of the stats events posted by the callbacks, indexing _appliers
+_TASK_STARTED = 0
+_TASK_FINISHED = 1
+_SETUP_FAILED = 2
+_EXITED = 3
+
+# Shortest gap between two frames, so a burst of callbacks renders once
+_MIN_RENDER_INTERVAL = 0.05
+
+_GPU_COLUMNS = ("GPU", "Status", "Current", "Completed", "Failed", "Timeout", "Last Time")
+
+_STATUS_STYLES = {
+    "processing": "yellow",
+    "idle": "green",
+    "initializing": "cyan",
+    "finished": "bold green",
+    "error": "bold red",
+}
+
 
 class RichDispatcher:
     """High-level dispatcher wrapper that renders live status with Rich."""
@@ -34,24 +55,53 @@ class RichDispatcher:
         show_ui: bool = True,
         refresh_rate: float = 2.0,
         console: Console | None = None,
-        suppress_worker_output: bool = True,
+        suppress_worker_output: bool | None = None,
+        batch_size: int = 1,
+        scheduler: str = "shared",
+        start_method: str = "spawn",
+        pin_cpus: bool = False,
+        payload_format: str | None = None,
+        sched_batch: bool = False,
+        backend: str = "processes",
     ) -> None:
         if refresh_rate <= 0:
             raise ValueError("refresh_rate must be positive")
+        if suppress_worker_output is None:
+            # Keep worker output from breaking up the UI; thread workers
+            # share the console and cannot be silenced separately
+            suppress_worker_output = backend == "processes"
 
         self._dispatcher = Dispatcher(
             worker_cls=worker_cls,
             gpu_ids=gpu_ids,
             queue_size=queue_size,
             suppress_worker_output=suppress_worker_output,
+            batch_size=batch_size,
+            scheduler=scheduler,
+            start_method=start_method,
+            pin_cpus=pin_cpus,
+            payload_format=payload_format,
+            sched_batch=sched_batch,
+            backend=backend,
         )
         self._gpu_ids = gpu_ids
         self._show_ui = show_ui
         self._refresh_rate = refresh_rate
         self._console = console
+        self._events: deque[tuple] = deque()
+        self._row_cache: dict[int, tuple[tuple, tuple]] = {}
+        self._appliers = (
+            self._apply_task_started,
+            self._apply_task_finished,
+            self._apply_setup_failed,
+            self._apply_exited,
+        )
 
         self._lock = threading.Lock()
         self._stop_event = threading.Event()
+        # Set by the callbacks so the render loop redraws status changes
+        # right away instead of on its next periodic tick
+        self._changed = threading.Event()
         self._exception: BaseException | None = None
         self._stats: dict[str, Any] = {}
         self._reset_stats()
@@ -70,20 +120,22 @@ class RichDispatcher:
         total_tasks: int | None = None,
         **setup_kwargs,
     ) -> dict[str, Any]:
-        """Execute the dispatcher and optionally display a live UI."""
+        """Execute the dispatcher and optionally display a live UI.
+
+        Returns a snapshot of the aggregated stats. It is a copy, so later
+        runs of this dispatcher do not modify it.
+        """
         self._reset_stats()
         self._stop_event = threading.Event()
         self._exception = None
         self._stats["start_time"] = time.perf_counter()
         self._stats["expected_total"] = total_tasks
 
-        # Signal handler to stop the dispatcher
-        def signal_handler(signum, frame):
-            self._dispatcher.shutdown()
-
-        # Register signal handlers in main thread
-        original_sigint = signal.signal(signal.SIGINT, signal_handler)
-        original_sigterm = signal.signal(signal.SIGTERM, signal_handler)
+        # The dispatcher runs on another thread, which cannot install
+        # signal handlers; registering it from here lets SIGINT/SIGTERM shut
+        # it down from start-up onwards (its shutdown state already exists)
+        self._dispatcher._prepare_run()
+        installed_handlers = register_dispatcher(self._dispatcher)
 
         dispatch_thread = threading.Thread(
             target=self._run_dispatcher,
@@ -108,15 +160,15 @@ class RichDispatcher:
             if self._show_ui:
                 self._render_loop(dispatch_thread)
             else:
-                # Wait for dispatch thread with periodic checks
+                # Wait for dispatch thread with periodic checks, applying
+                # the callbacks' events so they do not pile up
                 while dispatch_thread.is_alive():
                     dispatch_thread.join(timeout=0.5)
+                    self._drain_events()
         except KeyboardInterrupt:
             self._dispatcher.shutdown()
         finally:
-            # Restore signal handlers
-            signal.signal(signal.SIGINT, original_sigint)
-            signal.signal(signal.SIGTERM, original_sigterm)
+            unregister_dispatcher(self._dispatcher, installed_handlers)
 
             # Wait for dispatch thread to finish cleanup
             dispatch_thread.join(timeout=10.0)
@@ -124,7 +176,7 @@ class RichDispatcher:
         if self._exception:
             raise self._exception
 
-        return deepcopy(self._stats)
+        return self._snapshot()
 
     def _run_dispatcher(
         self,
@@ -141,7 +193,7 @@ class RichDispatcher:
         setup_kwargs: dict[str, Any],
     ) -> None:
         try:
-            self._dispatcher.run(
+            self._dispatcher._run(
                 generator=generator,
                 on_success=on_success,
                 on_error=on_error,
@@ -152,39 +204,23 @@ class RichDispatcher:
                 base_seed=base_seed,
                 task_timeout=task_timeout,
                 total_tasks=total_tasks,
-                **setup_kwargs,
+                setup_kwargs=setup_kwargs,
             )
         except BaseException as exc:  # Surface worker failures back to caller
             self._exception = exc
         finally:
             self._stop_event.set()
+            self._changed.set()
 
+    # The callbacks handed to the dispatcher are partials over the methods
+    # below rather than per-run closures, so a call goes through C-level
+    # argument binding straight into the method.
     def _wrap_task_start_callback(self, user_callback: StartCallback | None) -> StartCallback:
-        def wrapper(task_id: int, worker_id: int) -> None:
-            with self._lock:
-                worker_stats = self._stats["gpu_status"].get(worker_id)
-                if worker_stats is None:
-                    return
-                worker_stats["status"] = "processing"
-                worker_stats["current_task"] = task_id
-                worker_stats["task_start_time"] = time.perf_counter()
-            if user_callback:
-                user_callback(task_id, worker_id)
-
-        return wrapper
+        return partial(self._on_task_start, user_callback)
 
     def _wrap_task_result_callback(self, user_callback, stat_name: str):
         """Generic wrapper for success/error/timeout callbacks (reduces duplication)."""
-        def wrapper(task_id: int, data: Any, worker_id: int) -> None:
-            with self._lock:
-                self._stats[stat_name] += 1
-                self._stats["total"] += 1
-                worker_stats = self._stats["gpu_status"][worker_id]
-                worker_stats[stat_name] += 1
-                self._finalize_task(worker_stats)
-            if user_callback:
-                user_callback(task_id, data, worker_id)
-        return wrapper
+        return partial(self._on_task_result, user_callback, stat_name)
 
     def _wrap_success_callback(self, user_callback: SuccessCallback | None) -> SuccessCallback:
         return self._wrap_task_result_callback(user_callback, "completed")
@@ -196,60 +232,141 @@ class RichDispatcher:
         return self._wrap_task_result_callback(user_callback, "timeouts")
 
     def _wrap_setup_fail_callback(self, user_callback: SetupFailCallback | None) -> SetupFailCallback:
-        def wrapper(gpu_id: int, error: str) -> None:
-            with self._lock:
-                self._stats["setup_failures"] += 1
-                worker_stats = self._stats["gpu_status"].get(gpu_id)
-                if worker_stats is not None:
-                    worker_stats["status"] = "error"
-                    worker_stats["current_task"] = None
-                    worker_stats["task_start_time"] = None
-            if user_callback:
-                user_callback(gpu_id, error)
-
-        return wrapper
+        return partial(self._on_setup_fail, user_callback)
 
     def _wrap_exit_callback(self, user_callback: ExitCallback | None) -> ExitCallback:
-        def wrapper() -> None:
-            with self._lock:
-                self._stats["end_time"] = time.perf_counter()
-                for worker_stats in self._stats["gpu_status"].values():
-                    if worker_stats["status"] != "error":
-                        worker_stats["status"] = "finished"
-                        worker_stats["current_task"] = None
-                        worker_stats["task_start_time"] = None
-            if user_callback:
-                user_callback()
-
-        return wrapper
-
-    def _finalize_task(self, worker_stats: dict[str, Any]) -> None:
-        now = time.perf_counter()
+        return partial(self._on_exit, user_callback)
+
+    def _on_task_start(self, user_callback: StartCallback | None, task_id: int, worker_id: int) -> None:
+        self._post_event((_TASK_STARTED, task_id, worker_id, time.monotonic_ns()))
+        if user_callback:
+            user_callback(task_id, worker_id)
+
+    def _on_task_result(self, user_callback, stat_name: str, task_id: int, data: Any, worker_id: int) -> None:
+        self._post_event((_TASK_FINISHED, stat_name, worker_id, time.monotonic_ns()))
+        if user_callback:
+            user_callback(task_id, data, worker_id)
+
+    def _on_setup_fail(self, user_callback: SetupFailCallback | None, gpu_id: int, error: str) -> None:
+        self._post_event((_SETUP_FAILED, gpu_id))
+        if user_callback:
+            user_callback(gpu_id, error)
+
+    def _on_exit(self, user_callback: ExitCallback | None) -> None:
+        self._post_event((_EXITED, time.perf_counter()))
+        if user_callback:
+            user_callback()
+
+    def _post_event(self, event: tuple) -> None:
+        # deque.append is atomic, so callbacks never wait on the render
+        # thread; the stats are updated when the events are drained
+        self._events.append(event)
+        if not self._changed.is_set():
+            self._changed.set()
+
+    def _drain_events(self) -> None:
+        """Apply the events posted by the callbacks to the stats."""
+        events = self._events
+        if not events:
+            return
+        appliers = self._appliers
+        with self._lock:
+            while events:
+                event = events.popleft()
+                appliers[event[0]](*event[1:])
+            self._stats_rev += 1
+
+    def _apply_task_started(self, task_id: int, worker_id: int, now: int) -> None:
+        worker_stats = self._gpu_stats.get(worker_id)
+        if worker_stats is None:
+            return
+        worker_stats["status"] = "processing"
+        worker_stats["current_task"] = task_id
+        worker_stats["task_start_time"] = now
+
+    def _apply_task_finished(self, stat_name: str, worker_id: int, now: int) -> None:
+        stats = self._stats
+        stats[stat_name] += 1
+        stats["total"] += 1
+        worker_stats = self._gpu_stats[worker_id]
+        worker_stats[stat_name] += 1
+        self._finalize_task(worker_stats, now)
+
+    def _apply_setup_failed(self, gpu_id: int) -> None:
+        self._stats["setup_failures"] += 1
+        worker_stats = self._gpu_stats.get(gpu_id)
+        if worker_stats is not None:
+            worker_stats["status"] = "error"
+            worker_stats["current_task"] = None
+            worker_stats["task_start_time"] = None
+
+    def _apply_exited(self, end_time: float) -> None:
+        self._stats["end_time"] = end_time
+        for worker_stats in self._gpu_stats.values():
+            if worker_stats["status"] != "error":
+                worker_stats["status"] = "finished"
+                worker_stats["current_task"] = None
+                worker_stats["task_start_time"] = None
+
+    def _finalize_task(self, worker_stats: dict[str, Any], now: int) -> None:
+        # Task start times are integer nanoseconds; durations are seconds
         start_time = worker_stats.get("task_start_time")
         worker_stats["last_duration"] = None
         if start_time is not None:
-            worker_stats["last_duration"] = max(0.0, now - start_time)
+            worker_stats["last_duration"] = max(0, now - start_time) / 1e9
         worker_stats["task_start_time"] = None
         worker_stats["current_task"] = None
         if worker_stats["status"] != "error":
             worker_stats["status"] = "idle"
 
     def _render_loop(self, dispatch_thread: threading.Thread) -> None:
+        from rich.console import Console
+        from rich.live import Live
+
         console = self._console or Console()
         refresh_delay = 1.0 / self._refresh_rate
-        with Live(self._renderable(), console=console, refresh_per_second=self._refresh_rate, transient=True) as live:
+        live = Live(
+            console=console,
+            refresh_per_second=self._refresh_rate,
+            transient=True,
+            get_renderable=self._renderable,
+        )
+        with live:
             while dispatch_thread.is_alive() or not self._stop_event.is_set():
-                live.update(self._renderable(), refresh=True)
-                time.sleep(refresh_delay)
+                # Live's own timer redraws at refresh_rate so the elapsed time
+                # keeps ticking; stats changes are pushed out right away, at
+                # most once per _MIN_RENDER_INTERVAL
+                if not self._changed.wait(timeout=refresh_delay):
+                    continue
+                self._changed.clear()
+                live.refresh()
+                time.sleep(_MIN_RENDER_INTERVAL)
         dispatch_thread.join()
 
     def _renderable(self):
-        stats = self._snapshot()
-        overall = self._build_overall_panel(stats)
-        table = self._build_gpu_table(stats)
-        return Group(overall, table)
+        from rich.console import Group
+
+        # Rebuild the GPU table only when a callback changed the stats, and
+        # the overall panel only then or when the elapsed second ticks over
+        self._drain_events()
+        with self._lock:
+            rev = self._stats_rev
+        if rev != self._cached_rev:
+            self._cached_stats = self._snapshot()
+            self._cached_table = self._build_gpu_table(self._cached_stats)
+            self._cached_rev = rev
+        stats = self._cached_stats
+        elapsed_second = None
+        if stats["start_time"] is not None:
+            elapsed_second = int((stats["end_time"] or time.perf_counter()) - stats["start_time"])
+        if (rev, elapsed_second) != self._cached_panel_key:
+            self._cached_panel = self._build_overall_panel(stats)
+            self._cached_panel_key = (rev, elapsed_second)
+        return Group(self._cached_panel, self._cached_table)
 
     def _build_overall_panel(self, stats: dict[str, Any]) -> Panel:
+        from rich.panel import Panel
+
         completed = stats["completed"]
         failed = stats["failed"]
         timeouts = stats["timeouts"]
@@ -286,72 +403,73 @@ class RichDispatcher:
             if remaining > 0:
                 avg_time_per_task = elapsed / total
                 eta_seconds = remaining * avg_time_per_task
-                lines.append(f"Elapsed: {self._format_elapsed(elapsed)} | ETA: {self._format_elapsed(eta_seconds)} | Throughput: {throughput}")
+                lines.append(f"Elapsed: {_format_elapsed(elapsed)} | ETA: {_format_elapsed(eta_seconds)} | Throughput: {throughput}")
             else:
-                lines.append(f"Elapsed: {self._format_elapsed(elapsed)} | Throughput: {throughput}")
+                lines.append(f"Elapsed: {_format_elapsed(elapsed)} | Throughput: {throughput}")
         else:
-            lines.append(f"Elapsed: {self._format_elapsed(elapsed)} | Throughput: {throughput}")
+            lines.append(f"Elapsed: {_format_elapsed(elapsed)} | Throughput: {throughput}")
 
         return Panel("\n".join(lines), title="Overall Progress", border_style="cyan")
 
     def _build_gpu_table(self, stats: dict[str, Any]) -> Table:
+        from rich.table import Table
+
         table = Table(title="GPU Status", expand=True)
-        table.add_column("GPU", justify="center")
-        table.add_column("Status", justify="center")
-        table.add_column("Current", justify="center")
-        table.add_column("Completed", justify="center")
-        table.add_column("Failed", justify="center")
-        table.add_column("Timeout", justify="center")
-        table.add_column("Last Time", justify="center")
-
-        status_styles = {
-            "processing": "yellow",
-            "idle": "green",
-            "initializing": "cyan",
-            "finished": "bold green",
-            "error": "bold red",
-        }
+        for name in _GPU_COLUMNS:
+            table.add_column(name, justify="center")
 
         for gpu_id in self._gpu_ids:
-            worker_stats = stats["gpu_status"][gpu_id]
-            status = worker_stats["status"]
-            status_text = Text(status.title(), style=status_styles.get(status, "white"))
-
-            current_task = worker_stats["current_task"]
-            current_display = f"#{current_task}" if current_task is not None else "-"
-
-            last_time = worker_stats.get("last_duration")
-            table.add_row(
-                str(gpu_id),
-                status_text,
-                current_display,
-                str(worker_stats["completed"]),
-                str(worker_stats["failed"]),
-                str(worker_stats["timeouts"]),
-                self._format_last_time(last_time),
-            )
+            table.add_row(*self._gpu_row(gpu_id, stats["gpu_status"][gpu_id]))
 
         return table
 
-    def _format_elapsed(self, elapsed: float | None) -> str:
-        if elapsed is None:
-            return "--"
-        minutes, seconds = divmod(int(elapsed), 60)
-        hours, minutes = divmod(minutes, 60)
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-
-    def _format_last_time(self, duration: float | None) -> str:
-        if duration is None:
-            return "-"
-        if duration < 1:
-            return f"{duration * 1000:.0f} ms"
-        return f"{duration:.1f} s"
+    def _gpu_row(self, gpu_id: int, worker_stats: dict[str, Any]) -> tuple:
+        # Rows whose displayed values did not change reuse their cells, so
+        # a rebuild only stringifies the GPUs that actually moved
+        key = (
+            worker_stats["status"],
+            worker_stats["current_task"],
+            worker_stats["completed"],
+            worker_stats["failed"],
+            worker_stats["timeouts"],
+            worker_stats.get("last_duration"),
+        )
+        cached = self._row_cache.get(gpu_id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        status, current_task, completed, failed, timeouts, last_time = key
+        status_text = _status_text(status)
+        current_display = "#" + str(current_task) if current_task is not None else "-"
+        row = (
+            str(gpu_id),
+            status_text,
+            current_display,
+            str(completed),
+            str(failed),
+            str(timeouts),
+            _format_last_time(last_time),
+        )
+        self._row_cache[gpu_id] = (key, row)
+        return row
 
     def _snapshot(self) -> dict[str, Any]:
+        self._drain_events()
+        # Per-GPU dicts hold only primitives, so a two-level copy is a full
+        # copy and keeps the lock hold time short for the callbacks
         with self._lock:
-            return deepcopy(self._stats)
+            stats = dict(self._stats)
+            stats["gpu_status"] = {gpu_id: dict(worker_stats) for gpu_id, worker_stats in stats["gpu_status"].items()}
+        return stats
 
     def _reset_stats(self) -> None:
+        self._events.clear()
+        self._stats_rev = 0
+        self._cached_rev = -1
+        self._cached_stats: dict[str, Any] = {}
+        self._cached_table: Table | None = None
+        self._cached_panel: Panel | None = None
+        self._cached_panel_key: tuple[int, int | None] | None = None
         self._stats = {
             "total": 0,
             "completed": 0,
@@ -374,3 +492,42 @@ class RichDispatcher:
                 for gpu_id in self._gpu_ids
             },
         }
+        # Callbacks index the per-GPU stats directly
+        self._gpu_stats: dict[int, dict[str, Any]] = self._stats["gpu_status"]
+
+
+def _format_elapsed(elapsed: float | None) -> str:
+    if elapsed is None:
+        return "--"
+    return _format_clock(int(elapsed))
+
+
+def _format_last_time(duration: float | None) -> str:
+    if duration is None:
+        return "-"
+    return _format_milliseconds(round(duration * 1000))
+
+
+# Styled status cells, shared across rows and frames since Rich renders
+# Text without modifying it
+@lru_cache(maxsize=None)
+def _status_text(status: str) -> Text:
+    from rich.text import Text
+
+    return Text(status.title(), style=_STATUS_STYLES.get(status, "white"))
+
+
+# Formatting is memoized on whole seconds / milliseconds: elapsed times and
+# task durations repeat across frames and GPUs far more often than not
+@lru_cache(maxsize=1024)
+def _format_clock(seconds: int) -> str:
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+@lru_cache(maxsize=1024)
+def _format_milliseconds(milliseconds: int) -> str:
+    if milliseconds < 1000:
+        return f"{milliseconds} ms"
+    return f"{milliseconds / 1000:.1f} s"
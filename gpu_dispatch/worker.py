@@ -1,11 +1,21 @@
 import abc
+import builtins
+import ctypes
+import operator
+import pickle
 import signal
+import threading
+import time
 import traceback
+from collections import deque
 from queue import Empty
-from typing import Any
-from multiprocessing import Queue
+from typing import Any, Sequence
+from multiprocessing.connection import Connection
 
+from gpu_dispatch.local import LocalConnection, LocalRing
 from gpu_dispatch.protocol import TaskSuccess, TaskError, TaskTimeout, TaskStarted, SetupFailed, CleanupFailed
+from gpu_dispatch.ring import SPMCRing
+from gpu_dispatch.serialization import encode_message
 
 
 class BaseWorker(abc.ABC):
@@ -24,30 +34,329 @@ class BaseWorker(abc.ABC):
         pass
 
 
-def _timeout_handler(signum, frame):
-    raise TimeoutError("Task execution exceeded timeout")
+# Completed results are sent in small batches: a batch is flushed once it
+# holds _RESULT_BATCH_SIZE messages, once its oldest message has waited
+# _RESULT_FLUSH_INTERVAL seconds, or when the worker runs out of queued
+# work. A TaskStarted notification also forces a flush unless the previous
+# task ran shorter than _RESULT_FLUSH_INTERVAL, in which case the start
+# and its outcome most likely travel together. Messages held back by a
+# long task are picked up by a timer thread every _RESULT_STALL_CHECK
+# seconds; checking that rarely keeps its wake-ups (and the GIL handoffs
+# they cost) negligible for streams of fast tasks.
+_RESULT_BATCH_SIZE = 8
+_RESULT_FLUSH_INTERVAL = 0.002
+_RESULT_STALL_CHECK = 0.01
+
+# Message kinds of the per-task messages the main loop encodes itself
+_SUCCESS = TaskSuccess.kind
+_ERROR = TaskError.kind
+_TIMEOUT = TaskTimeout.kind
+_STARTED = TaskStarted.kind
+
+# Idle workers with neighbouring rings poll them for work to steal,
+# backing off exponentially between these bounds while nothing turns up.
+_STEAL_MIN_WAIT = 0.001
+_STEAL_MAX_WAIT = 0.1
+
+
+class _AlarmTimer:
+    """Per-task timeout backed by ``SIGALRM`` via a real-time interval timer.
+
+    Unlike ``signal.alarm`` this honours fractional timeouts, and the signal
+    also interrupts blocking calls such as ``time.sleep``. Only usable from
+    the main thread on platforms with ``setitimer``.
+
+    The kernel timer is not reset for every task: ``arm`` and ``disarm`` only
+    record the current deadline, and a timer that fires before the running
+    task's deadline re-arms itself for the remainder. Tasks shorter than the
+    timeout then cost a clock read instead of two ``setitimer`` calls.
+    """
+
+    def __init__(self, timeout: float) -> None:
+        self.timeout = timeout
+        self._deadline = None
+        self._pending = False
+        signal.signal(signal.SIGALRM, self._expire)
+
+    def arm(self) -> None:
+        self._deadline = time.monotonic() + self.timeout
+        if not self._pending:
+            self._pending = True
+            signal.setitimer(signal.ITIMER_REAL, self.timeout)
+
+    def disarm(self) -> None:
+        self._deadline = None
+
+    def close(self) -> None:
+        self._deadline = None
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+    def _expire(self, signum, frame) -> None:
+        deadline = self._deadline
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                # A later task is running; wait for its own deadline
+                signal.setitimer(signal.ITIMER_REAL, max(remaining, 1e-6))
+                return
+        self._pending = False
+        if deadline is not None:
+            self._deadline = None
+            raise TimeoutError("Task execution exceeded timeout")
+
+
+class _WatchdogTimer:
+    """Per-task timeout for platforms or threads where ``SIGALRM`` is unavailable.
+
+    A daemon thread waits for the deadline and raises ``TimeoutError``
+    asynchronously in the thread that created the timer. The exception is
+    only delivered between bytecodes, so a long blocking C call finishes
+    before it takes effect.
+    """
+
+    def __init__(self, timeout: float) -> None:
+        self.timeout = timeout
+        self._target = threading.get_ident()
+        self._cond = threading.Condition()
+        self._deadline = None
+        self._fired = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def arm(self) -> None:
+        with self._cond:
+            self._deadline = time.monotonic() + self.timeout
+            self._fired = False
+            self._cond.notify()
+
+    def disarm(self) -> None:
+        with self._cond:
+            self._deadline = None
+            if self._fired:
+                # Drop the exception if the task finished before it was raised
+                _set_async_exc(self._target, None)
+                self._fired = False
+
+    def close(self) -> None:
+        """Stop the watchdog thread, e.g. when a thread worker exits."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self) -> None:
+        with self._cond:
+            while not self._closed:
+                if self._deadline is None:
+                    self._cond.wait()
+                    continue
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                self._deadline = None
+                self._fired = True
+                _set_async_exc(self._target, TimeoutError)
+
+
+def _set_async_exc(thread_id: int, exc_type: type[BaseException] | None) -> None:
+    exc = ctypes.py_object(exc_type) if exc_type is not None else None
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), exc)
+
+
+def _make_task_timer(timeout: float) -> _AlarmTimer | _WatchdogTimer:
+    if hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread():
+        return _AlarmTimer(timeout)
+    return _WatchdogTimer(timeout)
+
+
+# Formatted tracebacks of recent task failures, keyed by exception type,
+# message and the code locations it was raised through, so a task that
+# keeps failing at the same spot is not re-formatted (re-reading source
+# lines) every time. Oldest entries are evicted first.
+_TRACEBACK_CACHE_SIZE = 64
+_traceback_cache: dict[tuple, str] = {}
+# Exception groups only exist from Python 3.11
+_EXCEPTION_GROUP = getattr(builtins, "BaseExceptionGroup", ())
+
+
+def _format_task_error(exc: Exception) -> str:
+    if (
+        exc.__cause__ is not None
+        or exc.__context__ is not None
+        or isinstance(exc, _EXCEPTION_GROUP)
+        or hasattr(exc, "__notes__")
+    ):
+        # Chained exceptions, groups and notes add parts the key does not
+        # cover; they are rare enough to format every time
+        return "".join(traceback.format_exception(exc))
+    locations = []
+    tb = exc.__traceback__
+    while tb is not None:
+        locations.append((tb.tb_frame.f_code, tb.tb_lineno))
+        tb = tb.tb_next
+    try:
+        key = (type(exc), str(exc), tuple(locations))
+    except Exception:
+        # A failing __str__ must not escape the worker loop; traceback
+        # formatting copes with it
+        return "".join(traceback.format_exception(exc))
+    formatted = _traceback_cache.get(key)
+    if formatted is None:
+        formatted = "".join(traceback.format_exception(exc))
+        if len(_traceback_cache) >= _TRACEBACK_CACHE_SIZE:
+            del _traceback_cache[next(iter(_traceback_cache))]
+        _traceback_cache[key] = formatted
+    return formatted
+
+
+def _send(result_conn: Connection | LocalConnection, messages: list) -> None:
+    _send_batch(result_conn, [encode_message(message) for message in messages])
+
+
+def _send_batch(result_conn: Connection | LocalConnection, batch: list) -> None:
+    if type(result_conn) is LocalConnection:
+        # Thread workers hand the batch over by reference
+        result_conn.send(batch)
+    else:
+        result_conn.send_bytes(pickle.dumps(batch, protocol=5))
+
+
+class _ResultBuffer:
+    """Encoded ``(kind, *fields)`` messages waiting to be sent in one batch.
+
+    The worker's main loop appends to :attr:`pending` directly (recording
+    in :attr:`since` when the oldest message arrived) and calls
+    :meth:`flush` when a batch is due. While it is busy in a long task it
+    cannot do that, so a daemon thread checks every
+    ``_RESULT_STALL_CHECK`` and sends messages that have outstayed
+    ``_RESULT_FLUSH_INTERVAL``. After a quiet check the thread sleeps until
+    the main loop, appending to an empty buffer while :attr:`idle` is set,
+    calls :meth:`wake`.
+    """
+
+    def __init__(self, result_conn: Connection | LocalConnection) -> None:
+        self.pending = deque()
+        self.since = 0.0
+        self.idle = False
+        self._conn = result_conn
+        self._send_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def flush(self) -> None:
+        """Send the pending messages; only called from the main loop."""
+        with self._send_lock:
+            pending = self.pending
+            if pending:
+                batch = list(pending)
+                pending.clear()
+                _send_batch(self._conn, batch)
+
+    def _flush_stalled(self) -> None:
+        with self._send_lock:
+            pending = self.pending
+            # Pop only what is there; the main loop may append meanwhile
+            batch = [pending.popleft() for _ in range(len(pending))]
+            if batch:
+                _send_batch(self._conn, batch)
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def close(self) -> None:
+        """Stop the timer thread and send whatever is left."""
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+
+    def _run(self) -> None:
+        quiet = False
+        while not self._closed:
+            if self.pending:
+                if time.monotonic() - self.since >= _RESULT_FLUSH_INTERVAL:
+                    self._flush_stalled()
+                quiet = False
+            elif quiet:
+                self.idle = True
+                # Re-checked after publishing idle: the main loop appends
+                # before it looks at idle, so no message is missed
+                if not self.pending:
+                    self._wake.wait()
+                self._wake.clear()
+                self.idle = quiet = False
+                continue
+            else:
+                quiet = True
+            time.sleep(_RESULT_STALL_CHECK)
+
+
+# Sort key for _steal; works for both SPMCRing and LocalRing
+_qsize = operator.methodcaller("qsize")
+
+
+def _steal(steal_queues: Sequence[SPMCRing | LocalRing]) -> Any:
+    """Take the oldest batch from the most loaded neighbouring ring.
+
+    Robbing the deepest backlog first evens out load fastest; ties keep
+    the nearest-first order of ``steal_queues``.
+    """
+    for queue in sorted(steal_queues, key=_qsize, reverse=True):
+        try:
+            return queue.get_nowait()
+        except Empty:
+            continue
+    raise Empty
+
+
+def _worker_thread_main(*args, **kwargs) -> None:
+    """Entry point of the "threads" backend: end the result stream on exit.
+
+    A worker process closing its pipe end signals EOF to the dispatcher;
+    a thread has to say so explicitly.
+    """
+    result_conn = args[4]
+    try:
+        _worker_main(*args, **kwargs)
+    finally:
+        result_conn.close_send()
 
 
 def _worker_main(
-    worker_instance: BaseWorker,
+    worker_cls: type[BaseWorker],
     gpu_id: int,
     seed: int,
-    task_queue: Queue,
-    result_queue: Queue,
+    task_queue: SPMCRing | LocalRing,
+    result_conn: Connection | LocalConnection,
     task_timeout: float | None,
     setup_kwargs: dict,
     shutdown_event=None,
+    steal_queues: Sequence[SPMCRing | LocalRing] = (),
+    emit_started: bool = True,
 ) -> None:
-    # Setup
+    # Setup; the worker is constructed here so only the class reference
+    # has to be shipped to the child process
     try:
+        worker_instance = worker_cls()
         worker_instance.setup(gpu_id=gpu_id, seed=seed, **setup_kwargs)
     except Exception:
         error_msg = traceback.format_exc()
-        result_queue.put(SetupFailed(gpu_id=gpu_id, error=error_msg))
+        _send(result_conn, [SetupFailed(gpu_id=gpu_id, error=error_msg)])
         return
 
-    if task_timeout is not None:
-        signal.signal(signal.SIGALRM, _timeout_handler)
+    timer = _make_task_timer(task_timeout) if task_timeout is not None else None
+
+    # Per-task messages are built directly in the encoded (kind, *fields)
+    # form of serialization.encode_message, skipping the dataclass
+    results = _ResultBuffer(result_conn)
+    pending = results.pending
+    pending_since = 0.0
+    last_duration = float("inf")
+    idle_wait = _STEAL_MIN_WAIT
 
     # Main loop
     while True:
@@ -55,44 +364,92 @@ def _worker_main(
         if shutdown_event is not None and shutdown_event.is_set():
             break
 
-        # Use timeout to allow checking shutdown_event periodically
+        # Flush buffered results before blocking so they never wait on idle
+        # time. An idle worker without neighbours blocks until work or the
+        # wake-up the dispatcher sends on shutdown (get() returns None) arrives.
         try:
-            item = task_queue.get(timeout=0.5)
+            if pending or steal_queues:
+                batch = task_queue.get_nowait()
+            else:
+                batch = task_queue.get()
         except Empty:
-            continue
+            results.flush()
+            if not steal_queues:
+                continue
+            try:
+                batch = _steal(steal_queues)
+            except Empty:
+                try:
+                    batch = task_queue.get(timeout=idle_wait)
+                except Empty:
+                    idle_wait = min(idle_wait * 2, _STEAL_MAX_WAIT)
+                    continue
+        idle_wait = _STEAL_MIN_WAIT
 
-        if item is None:
+        if batch is None:
             break
 
-        task_id, data = item
+        for task_id, data in batch:
+            if shutdown_event is not None and shutdown_event.is_set():
+                break
 
-        try:
-            if task_timeout is not None:
-                alarm_seconds = max(1, int(task_timeout + 0.5))
-                signal.alarm(alarm_seconds)
+            started = time.monotonic()
+            # Nobody listens for TaskStarted unless on_task_start is set
+            if emit_started:
+                if pending:
+                    pending.append((_STARTED, task_id, gpu_id))
+                else:
+                    results.since = pending_since = started
+                    pending.append((_STARTED, task_id, gpu_id))
+                    if results.idle:
+                        results.wake()
+                if last_duration >= _RESULT_FLUSH_INTERVAL:
+                    results.flush()
+
+            try:
+                # The timer may fire until it is disarmed, including while
+                # another exception from process() is propagating; disarming
+                # inside the outer try turns such a late timeout into a
+                # TaskTimeout instead of letting it escape the loop.
+                try:
+                    if timer is not None:
+                        timer.arm()
+
+                    result = worker_instance.process(data)
+
+                    outcome = (_SUCCESS, task_id, result, gpu_id)
 
-            result_queue.put(TaskStarted(task_id=task_id, worker_id=gpu_id))
-            result = worker_instance.process(data)
+                finally:
+                    if timer is not None:
+                        timer.disarm()
 
-            if task_timeout is not None:
-                signal.alarm(0)
+            except TimeoutError:
+                outcome = (_TIMEOUT, task_id, task_timeout, gpu_id)
 
-            result_queue.put(TaskSuccess(task_id=task_id, data=result, worker_id=gpu_id))
+            except Exception as exc:
+                error_msg = _format_task_error(exc)
+                outcome = (_ERROR, task_id, error_msg, gpu_id)
 
-        except TimeoutError:
-            if task_timeout is not None:
-                signal.alarm(0)
-            result_queue.put(TaskTimeout(task_id=task_id, timeout=task_timeout, worker_id=gpu_id))
+            now = time.monotonic()
+            last_duration = now - started
+            if pending:
+                pending.append(outcome)
+            else:
+                results.since = pending_since = now
+                pending.append(outcome)
+                # Looked at only after appending; see _ResultBuffer._run
+                if results.idle:
+                    results.wake()
+            if len(pending) >= _RESULT_BATCH_SIZE or now - pending_since >= _RESULT_FLUSH_INTERVAL:
+                results.flush()
 
-        except Exception:
-            if task_timeout is not None:
-                signal.alarm(0)
-            error_msg = traceback.format_exc()
-            result_queue.put(TaskError(task_id=task_id, error=error_msg, worker_id=gpu_id))
+    results.close()
+    if timer is not None:
+        timer.close()
 
     # Cleanup
     try:
         worker_instance.cleanup()
     except Exception:
         error_msg = traceback.format_exc()
-        result_queue.put(CleanupFailed(gpu_id=gpu_id, error=error_msg))
+        _send(result_conn, [CleanupFailed(gpu_id=gpu_id, error=error_msg)])
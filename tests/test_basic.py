@@ -45,6 +45,22 @@ class FailingSetupWorker(BaseWorker):
         pass
 
 
+class FlakySetupWorker(BaseWorker):
+    """A worker whose setup fails on every GPU except GPU 0."""
+
+    def setup(self, gpu_id: int, seed: int, **kwargs):
+        if gpu_id != 0:
+            raise RuntimeError("Intentional setup failure")
+        # Let the failures be reported before GPU 0 drains the queues
+        time.sleep(0.5)
+
+    def process(self, data):
+        return data
+
+    def cleanup(self):
+        pass
+
+
 class FailingProcessWorker(BaseWorker):
     """A worker that fails during processing."""
 
@@ -60,7 +76,21 @@ class FailingProcessWorker(BaseWorker):
         pass
 
 
-def test_basic_pipeline():
+@pytest.fixture(scope="module")
+def simple_dispatcher():
+    """One started SimpleWorker dispatcher (multiplier=2) shared by tests."""
+    dispatcher = Dispatcher(
+        worker_cls=SimpleWorker,
+        gpu_ids=[0],
+        queue_size=8,
+    )
+    dispatcher.start(multiplier=2)
+    yield dispatcher
+    dispatcher.close()
+
+
+@pytest.mark.xdist_group(name="simple_worker")
+def test_basic_pipeline(simple_dispatcher):
     """Test basic pipeline execution."""
     def generator():
         for i in range(10):
@@ -71,16 +101,9 @@ def test_basic_pipeline():
     def on_success(task_id, data, worker_id):
         results.append((task_id, data, worker_id))
 
-    dispatcher = Dispatcher(
-        worker_cls=SimpleWorker,
-        gpu_ids=[0],
-        queue_size=16,
-    )
-
-    dispatcher.run(
+    simple_dispatcher.submit(
         generator=generator(),
         on_success=on_success,
-        multiplier=2,
     )
 
     # Verify all tasks completed
@@ -91,6 +114,7 @@ def test_basic_pipeline():
         assert worker_id == 0
 
 
+@pytest.mark.xdist_group(name="simple_worker")
 def test_multiple_workers():
     """Test with multiple workers (simulating multiple GPUs)."""
     def generator():
@@ -224,34 +248,30 @@ def test_timeout():
     assert len(successes) == 0
 
 
-def test_backpressure():
+@pytest.mark.xdist_group(name="simple_worker")
+def test_backpressure(simple_dispatcher):
     """Test that the feeder respects queue size (backpressure)."""
     def generator():
         for i in range(1000):
             yield i
 
-    results = []
+    results = [None] * 1000
 
     def on_success(task_id, data, worker_id):
-        results.append(task_id)
-
-    dispatcher = Dispatcher(
-        worker_cls=SimpleWorker,
-        gpu_ids=[0],
-        queue_size=8,  # Very small queue
-    )
+        results[task_id] = task_id
 
-    # This should complete without memory issues
-    dispatcher.run(
+    # The shared dispatcher has a very small queue; this should complete
+    # without memory issues
+    simple_dispatcher.submit(
         generator=generator(),
         on_success=on_success,
-        multiplier=1,
     )
 
-    assert len(results) == 1000
+    assert results == list(range(1000))
 
 
-def test_empty_generator():
+@pytest.mark.xdist_group(name="simple_worker")
+def test_empty_generator(simple_dispatcher):
     """Test with an empty generator."""
     def generator():
         return
@@ -262,13 +282,7 @@ def test_empty_generator():
     def on_success(task_id, data, worker_id):
         results.append(task_id)
 
-    dispatcher = Dispatcher(
-        worker_cls=SimpleWorker,
-        gpu_ids=[0],
-        queue_size=16,
-    )
-
-    dispatcher.run(
+    simple_dispatcher.submit(
         generator=generator(),
         on_success=on_success,
     )
@@ -276,7 +290,8 @@ def test_empty_generator():
     assert len(results) == 0
 
 
-def test_on_exit_callback():
+@pytest.mark.xdist_group(name="simple_worker")
+def test_on_exit_callback(simple_dispatcher):
     """Verify the Dispatcher invokes on_exit exactly once."""
     def generator():
         for i in range(4):
@@ -290,22 +305,152 @@ def test_on_exit_callback():
     def on_exit():
         exit_called.append(True)
 
-    dispatcher = Dispatcher(
-        worker_cls=SimpleWorker,
-        gpu_ids=[0],
-        queue_size=8,
-    )
-
-    dispatcher.run(
+    simple_dispatcher.submit(
         generator=generator(),
         on_success=on_success,
         on_exit=on_exit,
-        multiplier=1,
     )
 
     assert exit_called == [True]
 
 
+class PidWorker(BaseWorker):
+    """A worker that reports the process it runs in."""
+
+    def setup(self, gpu_id: int, seed: int, **kwargs):
+        pass
+
+    def process(self, data):
+        import os
+        return os.getpid()
+
+    def cleanup(self):
+        pass
+
+
+def test_submit_reuses_started_workers():
+    """Submissions after start() run on the same worker processes."""
+    dispatcher = Dispatcher(worker_cls=PidWorker, gpu_ids=[0, 1])
+
+    with pytest.raises(RuntimeError, match="start"):
+        dispatcher.submit(iter(range(3)), on_success=print)
+
+    dispatcher.start()
+    try:
+        pids = set()
+        for _ in range(3):
+            results = {}
+            dispatcher.submit(
+                iter(range(20)),
+                on_success=lambda task_id, pid, worker_id: results.__setitem__(task_id, pid),
+            )
+            assert sorted(results) == list(range(20))
+            pids.update(results.values())
+    finally:
+        dispatcher.close()
+
+    assert len(pids) <= 2
+
+
+def test_submit_after_failed_callback_starts_clean():
+    """A submission aborted by its callback leaks no tasks or results into the next."""
+    dispatcher = Dispatcher(worker_cls=SimpleWorker, gpu_ids=[0, 1], queue_size=8)
+
+    def failing(task_id, data, worker_id):
+        raise ValueError("callback failed")
+
+    dispatcher.start()
+    try:
+        with pytest.raises(ValueError, match="callback failed"):
+            dispatcher.submit(iter(range(1000)), on_success=failing)
+
+        results = {}
+        dispatcher.submit(
+            iter(range(1000, 1020)),
+            on_success=lambda task_id, data, worker_id: results.__setitem__(task_id, data),
+        )
+        assert results == {i: 1000 + i for i in range(20)}
+    finally:
+        dispatcher.close()
+
+
+def test_shutdown_does_not_wait_for_blocked_generator():
+    """A feeder stuck in the generator is left behind instead of joined."""
+    import threading
+
+    release = threading.Event()
+
+    def generator():
+        yield 0
+        release.wait(timeout=30)
+        yield 1
+
+    dispatcher = Dispatcher(worker_cls=SimpleWorker, gpu_ids=[0], backend="threads")
+    started = time.monotonic()
+    try:
+        dispatcher.run(
+            generator=generator(),
+            on_success=lambda task_id, data, worker_id: dispatcher.shutdown(),
+        )
+        elapsed = time.monotonic() - started
+    finally:
+        release.set()
+
+    assert elapsed < 5.0
+
+
+def test_run_refuses_started_dispatcher():
+    """run() must not replace the session of a started dispatcher."""
+    dispatcher = Dispatcher(worker_cls=SimpleWorker, gpu_ids=[0])
+    dispatcher.start()
+    try:
+        with pytest.raises(RuntimeError, match="already started"):
+            dispatcher.run(iter(range(3)), on_success=print)
+        results = []
+        dispatcher.submit(iter(range(3)), on_success=lambda task_id, data, worker_id: results.append(data))
+        assert sorted(results) == [0, 1, 2]
+    finally:
+        dispatcher.close()
+
+
+def test_submit_after_shutdown_raises():
+    """submit() refuses to run once the dispatcher is shut down."""
+    import signal
+
+    original = signal.getsignal(signal.SIGINT)
+    dispatcher = Dispatcher(worker_cls=SimpleWorker, gpu_ids=[0])
+    dispatcher.start()
+    try:
+        # Handlers are only installed while a submission runs
+        assert signal.getsignal(signal.SIGINT) is original
+        dispatcher.shutdown()
+        with pytest.raises(RuntimeError, match="shut down"):
+            dispatcher.submit(iter(range(3)), on_success=print)
+    finally:
+        dispatcher.close()
+
+
+def test_failed_start_releases_resources():
+    """A worker that fails to spawn leaves the dispatcher closed and reusable."""
+    import threading
+
+    dispatcher = Dispatcher(worker_cls=SimpleWorker, gpu_ids=[0])
+
+    # Locks cannot be pickled for a spawned worker
+    with pytest.raises(TypeError):
+        dispatcher.start(lock=threading.Lock())
+    assert dispatcher._task_queues == [] and dispatcher._result_conns == []
+
+    dispatcher.start()
+    try:
+        results = []
+        dispatcher.submit(iter(range(3)), on_success=lambda task_id, data, worker_id: results.append(data))
+        assert sorted(results) == [0, 1, 2]
+    finally:
+        dispatcher.close()
+
+
+@pytest.mark.xdist_group(name="simple_worker")
 def test_on_task_start_callback():
     """Ensure task-start notifications track worker IDs."""
     total_tasks = 20
@@ -353,8 +498,12 @@ def test_rich_dispatcher_stats_no_ui():
     def on_success(task_id, data, worker_id):
         collected.append(worker_id)
 
+    import multiprocessing as mp
+
+    # Both workers must be up before the tasks are handed out, or the first
+    # one can drain the shared ring before the other finishes setup
     rich_dispatcher = RichDispatcher(
-        worker_cls=SimpleWorker,
+        worker_cls=BarrierWorker,
         gpu_ids=[0, 1],
         queue_size=16,
         show_ui=False,
@@ -363,7 +512,7 @@ def test_rich_dispatcher_stats_no_ui():
     stats = rich_dispatcher.run(
         generator=generator(),
         on_success=on_success,
-        multiplier=2,
+        barrier=mp.get_context("spawn").Barrier(2),
     )
 
     assert len(collected) == total_tasks
@@ -374,6 +523,15 @@ def test_rich_dispatcher_stats_no_ui():
         assert stats["gpu_status"][gpu_id]["completed"] >= 1
 
 
+def test_rich_dispatcher_import_skips_rich():
+    """Rich is only imported once a UI frame is built."""
+    import subprocess
+    import sys
+
+    code = "import sys, gpu_dispatch.ui; assert 'rich' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
 def test_rich_dispatcher_propagates_callbacks():
     """User callbacks should still run when using the Rich UI wrapper."""
     total_tasks = 6
@@ -408,3 +566,886 @@ def test_rich_dispatcher_propagates_callbacks():
     assert len(successes) == total_tasks
     assert len(task_starts) == total_tasks
     assert [task for task, _ in successes] == list(range(total_tasks))
+
+
+def test_batched_dispatch():
+    """Batched task handoff should deliver every task exactly once."""
+    total_tasks = 200
+
+    def generator():
+        for i in range(total_tasks):
+            yield i
+
+    results = {}
+
+    def on_success(task_id, data, worker_id):
+        results[task_id] = data
+
+    dispatcher = Dispatcher(
+        worker_cls=SimpleWorker,
+        gpu_ids=[0, 1],
+        queue_size=8,
+        batch_size=16,
+    )
+
+    dispatcher.run(
+        generator=generator(),
+        on_success=on_success,
+        multiplier=2,
+    )
+
+    assert sorted(results) == list(range(total_tasks))
+    assert all(data == task_id * 2 for task_id, data in results.items())
+
+
+def test_partial_batch_not_held_by_slow_generator():
+    """A partial batch is handed off while the generator blocks on the next item."""
+    delivered = {}
+
+    def generator():
+        yield 0
+        time.sleep(2.0)
+        yield 1
+
+    dispatcher = Dispatcher(
+        worker_cls=SimpleWorker,
+        gpu_ids=[0],
+        batch_size=4,
+        backend="threads",
+    )
+
+    start = time.monotonic()
+    dispatcher.run(
+        generator=generator(),
+        on_success=lambda task_id, data, worker_id: delivered.__setitem__(task_id, time.monotonic() - start),
+    )
+
+    assert sorted(delivered) == [0, 1]
+    assert delivered[0] < 1.0
+
+
+def test_on_success_batch_callback():
+    """Successes can be delivered in lists instead of one call per task."""
+    total_tasks = 200
+    batches = []
+
+    dispatcher = Dispatcher(
+        worker_cls=SimpleWorker,
+        gpu_ids=[0, 1],
+        batch_size=16,
+    )
+
+    dispatcher.run(
+        generator=iter(range(total_tasks)),
+        on_success_batch=batches.append,
+        multiplier=2,
+    )
+
+    results = [item for batch in batches for item in batch]
+    assert len(batches) < total_tasks
+    assert sorted(task_id for task_id, _, _ in results) == list(range(total_tasks))
+    assert all(data == task_id * 2 for task_id, data, _ in results)
+
+
+def test_run_requires_success_callback():
+    dispatcher = Dispatcher(worker_cls=SimpleWorker, gpu_ids=[0])
+
+    with pytest.raises(ValueError, match="on_success"):
+        dispatcher.run(generator=iter(range(3)))
+
+
+def test_packed_int_payloads():
+    """Integer tasks declared with payload_format bypass pickle end to end."""
+    total_tasks = 100
+    results = {}
+
+    def on_success(task_id, data, worker_id):
+        results[task_id] = data
+
+    dispatcher = Dispatcher(
+        worker_cls=SimpleWorker,
+        gpu_ids=[0, 1],
+        batch_size=8,
+        scheduler="round_robin",
+        payload_format="q",
+    )
+
+    dispatcher.run(
+        generator=iter(range(total_tasks)),
+        on_success=on_success,
+        multiplier=3,
+    )
+
+    assert results == {i: i * 3 for i in range(total_tasks)}
+
+
+@pytest.mark.parametrize("payload_format", ["not a format", "4s", "?", "f"])
+def test_invalid_payload_format(payload_format):
+    """Formats that could truncate, round or coerce a task are rejected."""
+    with pytest.raises(ValueError, match="payload_format"):
+        Dispatcher(worker_cls=SimpleWorker, gpu_ids=[0], payload_format=payload_format)
+
+
+def test_prefetched_generator():
+    """prefetch=True materializes the generator and still runs every task."""
+    total_tasks = 100
+    results = {}
+
+    def on_success(task_id, data, worker_id):
+        results[task_id] = data
+
+    dispatcher = Dispatcher(
+        worker_cls=SimpleWorker,
+        gpu_ids=[0, 1],
+        batch_size=16,
+    )
+
+    dispatcher.run(
+        generator=(i for i in range(total_tasks)),
+        on_success=on_success,
+        prefetch=True,
+        multiplier=2,
+    )
+
+    assert results == {i: i * 2 for i in range(total_tasks)}
+
+
+class BarrierWorker(BaseWorker):
+    """A worker that waits for every other worker to finish setup first."""
+
+    def setup(self, gpu_id: int, seed: int, **kwargs):
+        kwargs["barrier"].wait(timeout=30)
+
+    def process(self, data):
+        time.sleep(0.005)
+        return data
+
+    def cleanup(self):
+        pass
+
+
+def test_round_robin_scheduler():
+    """Per-worker rings should spread tasks over every worker."""
+    import multiprocessing as mp
+
+    total_tasks = 60
+
+    def generator():
+        for i in range(total_tasks):
+            yield i
+
+    results = {}
+
+    def on_success(task_id, data, worker_id):
+        results[task_id] = worker_id
+
+    dispatcher = Dispatcher(
+        worker_cls=BarrierWorker,
+        gpu_ids=[0, 1, 2],
+        queue_size=12,
+        scheduler="round_robin",
+    )
+
+    # Workers start processing together, so none has its ring emptied by
+    # the others' stealing before it is up
+    dispatcher.run(
+        generator=generator(),
+        on_success=on_success,
+        barrier=mp.get_context("spawn").Barrier(3),
+    )
+
+    assert sorted(results) == list(range(total_tasks))
+    assert set(results.values()) == {0, 1, 2}
+
+
+def test_round_robin_steals_from_failed_worker():
+    """Tasks queued for a worker that failed setup are stolen by the others."""
+    total_tasks = 50
+
+    def generator():
+        for i in range(total_tasks):
+            yield i
+
+    results = []
+    setup_failures = []
+
+    def on_success(task_id, data, worker_id):
+        results.append((task_id, worker_id))
+
+    def on_setup_fail(gpu_id, error):
+        setup_failures.append(gpu_id)
+
+    dispatcher = Dispatcher(
+        worker_cls=FlakySetupWorker,
+        gpu_ids=[0, 1],
+        queue_size=8,
+        scheduler="round_robin",
+    )
+
+    dispatcher.run(
+        generator=generator(),
+        on_success=on_success,
+        on_setup_fail=on_setup_fail,
+    )
+
+    assert setup_failures == [1]
+    assert sorted(task_id for task_id, _ in results) == list(range(total_tasks))
+    assert {worker_id for _, worker_id in results} == {0}
+
+
+@pytest.mark.timeout(20)
+def test_shutdown_stops_endless_generator():
+    """Calling shutdown() from a callback should end run() promptly."""
+    import itertools
+
+    results = []
+
+    dispatcher = Dispatcher(
+        worker_cls=SimpleWorker,
+        gpu_ids=[0],
+        queue_size=8,
+    )
+
+    def on_success(task_id, data, worker_id):
+        results.append(task_id)
+        if len(results) == 5:
+            dispatcher.shutdown()
+
+    dispatcher.run(
+        generator=itertools.count(),
+        on_success=on_success,
+    )
+
+    assert len(results) >= 5
+
+
+def test_fork_start_method():
+    """Workers started with fork should behave like spawned ones."""
+    import multiprocessing as mp
+    if "fork" not in mp.get_all_start_methods():
+        pytest.skip("fork start method not available")
+
+    def generator():
+        for i in range(20):
+            yield i
+
+    results = []
+
+    def on_success(task_id, data, worker_id):
+        results.append(data)
+
+    dispatcher = Dispatcher(
+        worker_cls=SimpleWorker,
+        gpu_ids=[0, 1],
+        queue_size=8,
+        start_method="fork",
+    )
+
+    dispatcher.run(
+        generator=generator(),
+        on_success=on_success,
+        multiplier=3,
+    )
+
+    assert sorted(results) == [i * 3 for i in range(20)]
+
+
+def test_imap_streams_outcomes():
+    """imap() should yield one outcome per task without callbacks."""
+    from gpu_dispatch import TaskError, TaskSuccess
+
+    dispatcher = Dispatcher(
+        worker_cls=FailingProcessWorker,
+        gpu_ids=[0, 1],
+        queue_size=4,
+    )
+
+    outcomes = list(dispatcher.imap(range(10)))
+
+    assert sorted(o.task_id for o in outcomes) == list(range(10))
+    errors = [o for o in outcomes if isinstance(o, TaskError)]
+    assert [o.task_id for o in errors] == [5]
+    assert sorted(o.data for o in outcomes if isinstance(o, TaskSuccess)) == [i for i in range(10) if i != 5]
+
+
+@pytest.mark.timeout(20)
+def test_imap_close_shuts_down():
+    """Abandoning the imap() iterator should stop an endless generator."""
+    import itertools
+
+    dispatcher = Dispatcher(
+        worker_cls=SimpleWorker,
+        gpu_ids=[0],
+        queue_size=8,
+    )
+
+    stream = dispatcher.imap(itertools.count(), multiplier=2)
+    first = [next(stream) for _ in range(5)]
+    stream.close()
+
+    assert all(o.data == o.task_id * 2 for o in first)
+
+
+def test_imap_raises_when_all_workers_fail():
+    """Errors from the background run() should reach the consumer."""
+    dispatcher = Dispatcher(
+        worker_cls=FailingSetupWorker,
+        gpu_ids=[0],
+    )
+
+    with pytest.raises(RuntimeError, match="All workers failed"):
+        list(dispatcher.imap(range(5)))
+
+
+def test_large_results():
+    """Results larger than the monitor's receive buffer arrive intact."""
+    payloads = [bytes([i]) * (200_000 * (i + 1)) for i in range(3)]
+    results = {}
+
+    def on_success(task_id, data, worker_id):
+        results[task_id] = data
+
+    dispatcher = Dispatcher(
+        worker_cls=SimpleWorker,
+        gpu_ids=[0],
+    )
+
+    dispatcher.run(
+        generator=iter(payloads),
+        on_success=on_success,
+    )
+
+    assert [results[i] for i in range(3)] == payloads
+
+
+class AffinityWorker(BaseWorker):
+    """A worker that reports the CPUs it may run on."""
+
+    def setup(self, gpu_id: int, seed: int, **kwargs):
+        pass
+
+    def process(self, data):
+        import os
+        return sorted(os.sched_getaffinity(0))
+
+    def cleanup(self):
+        pass
+
+
+def test_pin_cpus():
+    """Each worker should be pinned to its CPU slice and the caller restored."""
+    import os
+    from gpu_dispatch.dispatcher import _split_cpus
+    if not hasattr(os, "sched_setaffinity"):
+        pytest.skip("sched_setaffinity not available")
+
+    original = os.sched_getaffinity(0)
+    results = []
+
+    def on_success(task_id, data, worker_id):
+        results.append(data)
+
+    dispatcher = Dispatcher(
+        worker_cls=AffinityWorker,
+        gpu_ids=[0, 1],
+        pin_cpus=True,
+    )
+
+    dispatcher.run(
+        generator=iter(range(4)),
+        on_success=on_success,
+    )
+
+    assert len(results) == 4
+    cpus = sorted(original)
+    slices = _split_cpus(cpus[1:] or cpus, 2)
+    assert all(set(worker_cpus) in slices for worker_cpus in results)
+    assert os.sched_getaffinity(0) == original
+
+
+class SchedulerPolicyWorker(BaseWorker):
+    """A worker that reports its scheduling policy."""
+
+    def setup(self, gpu_id: int, seed: int, **kwargs):
+        pass
+
+    def process(self, data):
+        import os
+        return os.sched_getscheduler(0)
+
+    def cleanup(self):
+        pass
+
+
+def test_sched_batch():
+    """Workers should run under SCHED_BATCH when requested."""
+    import os
+    if not hasattr(os, "SCHED_BATCH"):
+        pytest.skip("SCHED_BATCH not available")
+
+    results = []
+
+    def on_success(task_id, data, worker_id):
+        results.append(data)
+
+    dispatcher = Dispatcher(
+        worker_cls=SchedulerPolicyWorker,
+        gpu_ids=[0, 1],
+        sched_batch=True,
+    )
+
+    dispatcher.run(
+        generator=iter(range(4)),
+        on_success=on_success,
+    )
+
+    assert results == [os.SCHED_BATCH] * 4
+    assert os.sched_getscheduler(0) != os.SCHED_BATCH
+
+
+@pytest.mark.parametrize("scheduler", ["shared", "round_robin", "least_loaded"])
+def test_threads_backend(scheduler):
+    """Thread workers run every task and hand results over unpickled."""
+    total_tasks = 200
+    # Identity only survives if nothing is pickled on the way
+    payload = object()
+    results = {}
+
+    def on_success(task_id, data, worker_id):
+        results[task_id] = data
+
+    dispatcher = Dispatcher(
+        worker_cls=SlowWorker,
+        gpu_ids=[0, 1],
+        batch_size=8,
+        scheduler=scheduler,
+        backend="threads",
+    )
+
+    dispatcher.run(
+        generator=iter([payload] * total_tasks),
+        on_success=on_success,
+        sleep_time=0,
+    )
+
+    assert sorted(results) == list(range(total_tasks))
+    assert all(data is payload for data in results.values())
+
+
+def test_threads_backend_rejects_process_options():
+    """Options that only apply to worker processes are not silently ignored."""
+    with pytest.raises(ValueError, match="pin_cpus, suppress_worker_output"):
+        Dispatcher(
+            worker_cls=SimpleWorker,
+            gpu_ids=[0],
+            pin_cpus=True,
+            suppress_worker_output=True,
+            backend="threads",
+        )
+    # RichDispatcher only defaults to silencing worker processes
+    RichDispatcher(worker_cls=SimpleWorker, gpu_ids=[0], show_ui=False, backend="threads")
+
+
+def test_threads_backend_timeout():
+    """Thread workers time out through the watchdog and leave no threads behind."""
+    import threading
+
+    before = threading.active_count()
+    timeouts = []
+
+    dispatcher = Dispatcher(
+        worker_cls=SlowWorker,
+        gpu_ids=[0],
+        backend="threads",
+    )
+
+    dispatcher.run(
+        generator=iter(range(2)),
+        on_success=lambda task_id, data, worker_id: None,
+        on_timeout=lambda task_id, timeout, worker_id: timeouts.append(task_id),
+        task_timeout=0.1,
+        sleep_time=0.3,
+    )
+
+    assert timeouts == [0, 1]
+    assert threading.active_count() == before
+
+
+class SecondTaskSlowWorker(BaseWorker):
+    """A worker whose task 1 takes a second and every other task is instant."""
+
+    def setup(self, gpu_id: int, seed: int, **kwargs):
+        pass
+
+    def process(self, data):
+        if data == 1:
+            time.sleep(1.0)
+        return data
+
+    def cleanup(self):
+        pass
+
+
+def test_result_not_held_back_by_next_task():
+    """A finished result is sent while the worker is busy with a long next task."""
+    delivered = {}
+
+    dispatcher = Dispatcher(
+        worker_cls=SecondTaskSlowWorker,
+        gpu_ids=[0],
+        backend="threads",
+    )
+
+    start = time.monotonic()
+    dispatcher.run(
+        generator=[0, 1],
+        on_success=lambda task_id, data, worker_id: delivered.__setitem__(task_id, time.monotonic() - start),
+    )
+
+    assert sorted(delivered) == [0, 1]
+    assert delivered[0] < 0.5
+
+
+def test_split_cpus():
+    """CPUs are split into even disjoint slices, shared only when scarce."""
+    from gpu_dispatch.dispatcher import _split_cpus
+
+    assert _split_cpus(list(range(7)), 3) == [{0, 1, 2}, {3, 4}, {5, 6}]
+    assert _split_cpus([0, 1], 3) == [{0}, {1}, {0}]
+
+
+@pytest.mark.timeout(20)
+def test_sigint_shuts_down_and_restores_handler():
+    """SIGINT during run() should stop it, then the old handler is restored."""
+    import itertools
+    import os
+    import signal
+
+    original = signal.getsignal(signal.SIGINT)
+    results = []
+
+    def on_success(task_id, data, worker_id):
+        results.append(task_id)
+        if len(results) == 3:
+            os.kill(os.getpid(), signal.SIGINT)
+
+    dispatcher = Dispatcher(
+        worker_cls=SimpleWorker,
+        gpu_ids=[0],
+        queue_size=8,
+    )
+
+    dispatcher.run(
+        generator=itertools.count(),
+        on_success=on_success,
+    )
+
+    assert len(results) >= 3
+    assert signal.getsignal(signal.SIGINT) is original
+
+
+def test_rich_dispatcher_sigint_uses_shared_handler():
+    """RichDispatcher.run() goes through the dispatcher's SIGINT handling."""
+    import itertools
+    import os
+    import signal
+
+    from gpu_dispatch.dispatcher import _active_dispatchers, _handle_shutdown_signal
+
+    original = signal.getsignal(signal.SIGINT)
+    handlers = []
+
+    def on_success(task_id, data, worker_id):
+        if not handlers:
+            handlers.append(signal.getsignal(signal.SIGINT))
+            os.kill(os.getpid(), signal.SIGINT)
+
+    rich_dispatcher = RichDispatcher(worker_cls=SimpleWorker, gpu_ids=[0], queue_size=8, show_ui=False)
+    rich_dispatcher.run(generator=itertools.count(), on_success=on_success)
+
+    assert handlers == [_handle_shutdown_signal]
+    assert signal.getsignal(signal.SIGINT) is original
+    assert _active_dispatchers == []
+
+
+def test_rich_dispatcher_sigint_during_startup():
+    """A SIGINT that arrives before the workers are started is not lost."""
+    import itertools
+    import os
+    import signal
+
+    rich_dispatcher = RichDispatcher(worker_cls=SimpleWorker, gpu_ids=[0], queue_size=8, show_ui=False)
+    dispatcher = rich_dispatcher._dispatcher
+    start = dispatcher._start
+
+    def interrupted_start(*args, **kwargs):
+        os.kill(os.getpid(), signal.SIGINT)
+        time.sleep(0.2)
+        start(*args, **kwargs)
+
+    dispatcher._start = interrupted_start
+    stats = rich_dispatcher.run(generator=itertools.count(), on_success=lambda *args: None)
+
+    assert stats["completed"] < 1000
+
+
+def test_rich_dispatcher_snapshot_is_isolated():
+    """Snapshots must not alias the live per-GPU stats."""
+    rich_dispatcher = RichDispatcher(
+        worker_cls=SimpleWorker,
+        gpu_ids=[0, 1],
+        show_ui=False,
+    )
+
+    snapshot = rich_dispatcher._snapshot()
+    rich_dispatcher._stats["gpu_status"][0]["completed"] = 5
+    rich_dispatcher._stats["total"] = 5
+
+    assert snapshot["gpu_status"][0]["completed"] == 0
+    assert snapshot["total"] == 0
+
+
+def test_rich_dispatcher_reuses_renderables_until_stats_change():
+    """The panel and GPU table are rebuilt only after a callback updates the stats."""
+    rich_dispatcher = RichDispatcher(
+        worker_cls=SimpleWorker,
+        gpu_ids=[0],
+        show_ui=False,
+    )
+
+    first_panel, first = rich_dispatcher._renderable().renderables
+    panel, table = rich_dispatcher._renderable().renderables
+    assert table is first
+    assert panel is first_panel
+
+    rich_dispatcher._wrap_task_start_callback(None)(0, 0)
+    panel, table = rich_dispatcher._renderable().renderables
+    assert table is not first
+    assert panel is not first_panel
+
+
+def test_rich_dispatcher_ui_exits_without_waiting_for_refresh():
+    """The render loop should wake as soon as the dispatcher finishes."""
+    import io
+    from rich.console import Console
+
+    rich_dispatcher = RichDispatcher(
+        worker_cls=SimpleWorker,
+        gpu_ids=[0],
+        refresh_rate=0.2,
+        console=Console(file=io.StringIO()),
+    )
+
+    start = time.monotonic()
+    stats = rich_dispatcher.run(generator=iter(range(5)))
+
+    assert stats["completed"] == 5
+    assert time.monotonic() - start < 4.0
+
+
+@pytest.mark.timeout(10)
+def test_subsecond_timeout():
+    """Fractional timeouts should not be rounded up to whole seconds."""
+    timeouts = []
+
+    def on_timeout(task_id, timeout_val, worker_id):
+        timeouts.append(timeout_val)
+
+    dispatcher = Dispatcher(
+        worker_cls=SlowWorker,
+        gpu_ids=[0],
+    )
+
+    start = time.monotonic()
+    dispatcher.run(
+        generator=iter(range(4)),
+        on_success=lambda *args: None,
+        on_timeout=on_timeout,
+        task_timeout=0.2,
+        sleep_time=5.0,
+    )
+
+    assert timeouts == [0.2] * 4
+    # 4 tasks at 0.2 s each plus startup, well below a rounded-up 1 s each
+    assert time.monotonic() - start < 3.0
+
+
+def test_watchdog_timer_interrupts_python_code():
+    """The thread-based timer raises TimeoutError in the arming thread."""
+    from gpu_dispatch.worker import _WatchdogTimer
+
+    timer = _WatchdogTimer(0.1)
+    timer.arm()
+    with pytest.raises(TimeoutError):
+        deadline = time.monotonic() + 5.0
+        while time.monotonic() < deadline:
+            pass
+    timer.disarm()
+
+    # A disarmed timer must not fire later
+    timer.arm()
+    timer.disarm()
+    time.sleep(0.2)
+
+
+def test_alarm_timer_tracks_rearmed_deadlines():
+    """The signal timer honours each task's own deadline without resetting."""
+    import signal
+    from gpu_dispatch.worker import _AlarmTimer
+
+    timer = _AlarmTimer(0.2)
+    try:
+        # Short tasks leave the kernel timer running...
+        for _ in range(3):
+            timer.arm()
+            time.sleep(0.1)
+            timer.disarm()
+
+        # ...but a later task still gets its full timeout before it fires
+        timer.arm()
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            time.sleep(5.0)
+        assert time.monotonic() - start >= 0.19
+        timer.disarm()
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, signal.SIG_DFL)
+
+
+def test_task_error_traceback_cache():
+    """Repeated failures reuse the formatted traceback without changing it."""
+    import traceback
+    from gpu_dispatch.worker import _format_task_error
+
+    def fail(value):
+        raise ValueError(f"bad value {value}")
+
+    formatted = []
+    expected = []
+    for value in (1, 1, 2):
+        try:
+            fail(value)
+        except ValueError as exc:
+            formatted.append(_format_task_error(exc))
+            expected.append(traceback.format_exc())
+
+    assert formatted == expected
+    assert formatted[0] is formatted[1]
+    assert "bad value 2" in formatted[2]
+
+
+def test_task_error_traceback_cache_skips_uncovered_parts():
+    """Notes and a failing __str__ are formatted fresh instead of cached."""
+    import traceback
+    from gpu_dispatch.worker import _format_task_error
+
+    class Unprintable(Exception):
+        def __str__(self):
+            raise RuntimeError("no str")
+
+    def fail(note):
+        exc = ValueError("bad value")
+        exc.__notes__ = [note]
+        raise exc
+
+    formatted = []
+    expected = []
+    for note in ("first", "second"):
+        try:
+            fail(note)
+        except ValueError as exc:
+            formatted.append(_format_task_error(exc))
+            expected.append(traceback.format_exc())
+    try:
+        raise Unprintable()
+    except Unprintable as exc:
+        formatted.append(_format_task_error(exc))
+        expected.append(traceback.format_exc())
+
+    assert formatted == expected
+
+
+def test_steal_prefers_most_loaded_ring():
+    """Idle workers rob the neighbour with the deepest backlog first."""
+    from gpu_dispatch.ring import SPMCRing
+    from gpu_dispatch.worker import _steal
+
+    near, far = SPMCRing(4, slot_size=64), SPMCRing(4, slot_size=64)
+    try:
+        near.put("near")
+        far.put("far-1")
+        far.put("far-2")
+        assert _steal([near, far]) == "far-1"
+        assert _steal([near, far]) == "near"
+    finally:
+        near.close()
+        far.close()
+
+
+class HeterogeneousWorker(BaseWorker):
+    """A worker whose GPU 0 is ten times slower than the others."""
+
+    def setup(self, gpu_id: int, seed: int, **kwargs):
+        self.delay = 0.02 if gpu_id == 0 else 0.002
+
+    def process(self, data):
+        time.sleep(self.delay)
+        return data
+
+    def cleanup(self):
+        pass
+
+
+def test_least_loaded_scheduler():
+    """Faster workers should receive more tasks under least_loaded."""
+    total_tasks = 100
+    results = {}
+
+    def on_success(task_id, data, worker_id):
+        results[task_id] = worker_id
+
+    dispatcher = Dispatcher(
+        worker_cls=HeterogeneousWorker,
+        gpu_ids=[0, 1],
+        queue_size=8,
+        scheduler="least_loaded",
+    )
+
+    dispatcher.run(
+        generator=iter(range(total_tasks)),
+        on_success=on_success,
+    )
+
+    assert sorted(results) == list(range(total_tasks))
+    workers = list(results.values())
+    assert workers.count(1) > workers.count(0)
+
+
+@pytest.mark.parametrize("scheduler, depths", [
+    ("least_loaded", [3, 3, 2]),
+    ("round_robin", [5, 2, 1]),
+])
+def test_least_loaded_fills_shallowest_ring(scheduler, depths):
+    """least_loaded tops up the emptiest rings instead of rotating over all of them."""
+    import itertools
+    import threading
+
+    from gpu_dispatch.local import LocalRing
+
+    dispatcher = Dispatcher(
+        worker_cls=SimpleWorker,
+        gpu_ids=[0, 1, 2],
+        scheduler=scheduler,
+        backend="threads",
+    )
+    rings = [LocalRing(8) for _ in range(3)]
+    for ring, backlog in zip(rings, [3, 1, 0]):
+        for i in range(backlog):
+            ring.put([(i, i)])
+
+    cursor = itertools.count()
+    for i in range(4):
+        assert dispatcher._put_batch(rings, [(i, i)], threading.Event(), cursor)
+
+    assert [ring.qsize() for ring in rings] == depths
@@ -0,0 +1,47 @@
+from multiprocessing.connection import wait
+from queue import Empty, Full
+
+import pytest
+
+from gpu_dispatch.local import LocalConnection, LocalRing
+
+
+def test_local_ring_matches_spmc_ring_semantics():
+    """Bounded FIFO with cancel_put() and wake() like SPMCRing."""
+    ring = LocalRing(2)
+    ring.put(1)
+    ring.put(2)
+    with pytest.raises(Full):
+        ring.put(3, timeout=0.01)
+    assert ring.qsize() == 2
+
+    # A cancellation with no put waiting fails the next put
+    ring.cancel_put()
+    with pytest.raises(Full):
+        ring.put(3, timeout=0.01)
+
+    ring.wake()
+    assert ring.get_nowait() == 1
+    assert ring.get_nowait() == 2
+    assert ring.get_nowait() is None
+    with pytest.raises(Empty):
+        ring.get_nowait()
+
+
+def test_local_connection_passes_batches_by_reference():
+    """Batches arrive as the same objects and EOF follows close_send()."""
+    conn = LocalConnection()
+    try:
+        batch = [object()]
+        conn.send(batch)
+        assert wait([conn], timeout=1.0) == [conn]
+        assert conn.recv() is batch
+        assert not conn.poll()
+
+        conn.close_send()
+        for _ in range(2):
+            assert wait([conn], timeout=1.0) == [conn]
+            with pytest.raises(EOFError):
+                conn.recv()
+    finally:
+        conn.close()
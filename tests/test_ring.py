@@ -0,0 +1,193 @@
+import multiprocessing as mp
+from queue import Empty, Full
+
+import pytest
+
+from gpu_dispatch.ring import SPMCRing
+
+
+def _consume(ring, out_queue, count):
+    for _ in range(count):
+        out_queue.put(ring.get(timeout=5.0))
+    ring.close()
+
+
+def test_ring_fifo_roundtrip():
+    """Items come back in insertion order with their original values."""
+    ring = SPMCRing(4, slot_size=128)
+    try:
+        items = [(0, "a"), (1, {"k": [1, 2]}), (2, None)]
+        for item in items:
+            ring.put(item)
+        assert [ring.get_nowait() for _ in items] == items
+    finally:
+        ring.close()
+
+
+def test_ring_full_and_empty():
+    """A full ring rejects puts and an empty ring rejects gets."""
+    ring = SPMCRing(2, slot_size=64)
+    try:
+        with pytest.raises(Empty):
+            ring.get_nowait()
+        ring.put(1)
+        ring.put(2)
+        with pytest.raises(Full):
+            ring.put(3, timeout=0.01)
+        assert ring.get_nowait() == 1
+        ring.put(3, timeout=0.01)
+    finally:
+        ring.close()
+
+
+def test_ring_spans_payloads_over_consecutive_slots():
+    """Payloads larger than a slot take several slots, wrapping around the end."""
+    ring = SPMCRing(4, slot_size=64)
+    try:
+        ring.put((0, "a"))
+        ring.put((1, "b"))
+        assert ring.get_nowait() == (0, "a")
+        assert ring.get_nowait() == (1, "b")
+        # Starts in the third slot and runs on into the first one
+        large = (2, b"x" * 150)
+        ring.put(large)
+        assert ring.qsize() == 3
+        with pytest.raises(Full):
+            ring.put((3, b"y" * 100), timeout=0.01)
+        ring.put((3, "c"))
+        assert ring.get_nowait() == large
+        assert ring.get_nowait() == (3, "c")
+        assert ring.qsize() == 0
+    finally:
+        ring.close()
+
+
+def test_ring_spills_oversized_payloads():
+    """Payloads larger than the whole ring travel through a dedicated segment."""
+    ring = SPMCRing(2, slot_size=64)
+    try:
+        payload = b"x" * 10_000
+        ring.put((7, payload))
+        assert ring.get_nowait() == (7, payload)
+    finally:
+        ring.close()
+
+
+def test_ring_multiple_consumer_processes():
+    """Every item is delivered exactly once across consumer processes."""
+    ctx = mp.get_context("spawn")
+    ring = SPMCRing(8, slot_size=128, ctx=ctx)
+    out_queue = ctx.Queue()
+    consumers = [ctx.Process(target=_consume, args=(ring, out_queue, 50)) for _ in range(2)]
+    for p in consumers:
+        p.start()
+    try:
+        for i in range(100):
+            ring.put(i, timeout=5.0)
+        received = sorted(out_queue.get(timeout=5.0) for _ in range(100))
+        assert received == list(range(100))
+    finally:
+        for p in consumers:
+            p.join(timeout=5.0)
+        ring.close()
+
+
+
+def test_ring_cancel_put_unblocks_producer():
+    """cancel_put() aborts a put blocked on a full ring without losing slots."""
+    import threading
+
+    ring = SPMCRing(1, slot_size=64)
+    try:
+        ring.put(1)
+        errors = []
+
+        def blocked_put():
+            try:
+                ring.put(2)
+            except Full:
+                errors.append("cancelled")
+
+        producer = threading.Thread(target=blocked_put)
+        producer.start()
+        ring.cancel_put()
+        producer.join(timeout=5.0)
+
+        assert errors == ["cancelled"]
+        assert ring.get_nowait() == 1
+        ring.put(3, timeout=0.01)
+        with pytest.raises(Full):
+            ring.put(4, timeout=0.01)
+    finally:
+        ring.close()
+
+
+def test_ring_wake_returns_none_after_items():
+    """wake() unblocks a consumer even on a full ring, without losing items."""
+    import threading
+
+    ring = SPMCRing(1, slot_size=64)
+    try:
+        received = []
+        consumer = threading.Thread(target=lambda: received.append(ring.get(timeout=5.0)))
+        consumer.start()
+        ring.wake()
+        consumer.join(timeout=5.0)
+        assert received == [None]
+
+        ring.put(1)
+        ring.wake()
+        assert ring.get_nowait() == 1
+        assert ring.get_nowait() is None
+        with pytest.raises(Empty):
+            ring.get_nowait()
+        ring.put(2, timeout=0.01)
+    finally:
+        ring.close()
+
+
+def test_ring_qsize_tracks_fill_level():
+    """qsize() reports the number of items waiting in the ring."""
+    ring = SPMCRing(4, slot_size=64)
+    try:
+        assert ring.qsize() == 0
+        ring.put(1)
+        ring.put(2)
+        assert ring.qsize() == 2
+        ring.get_nowait()
+        assert ring.qsize() == 1
+    finally:
+        ring.close()
+
+
+def test_ring_packs_batches_with_item_format():
+    """Batches matching item_format skip pickle; anything else still works."""
+    ring = SPMCRing(4, slot_size=64, item_format="q")
+    try:
+        small = [(0, 10), (1, -3)]
+        large = [(i, i * i) for i in range(100)]
+        ring.put(small)
+        ring.put(large)
+        ring.put([(2, "text")])
+        ring.put(None)
+        assert ring.get_nowait() == small
+        assert ring.get_nowait() == large
+        assert ring.get_nowait() == [(2, "text")]
+        assert ring.get_nowait() is None
+    finally:
+        ring.close()
+
+
+def test_ring_put_encoded_reuses_one_encoding():
+    """An encode() result can be put into several rings with the same format."""
+    first, second = SPMCRing(1, slot_size=64), SPMCRing(1, slot_size=64)
+    try:
+        encoded = first.encode([(0, "a")])
+        first.put_encoded(encoded)
+        with pytest.raises(Full):
+            first.put_encoded(encoded, timeout=0)
+        second.put_encoded(encoded, timeout=0)
+        assert first.get_nowait() == second.get_nowait() == [(0, "a")]
+    finally:
+        first.close()
+        second.close()
@@ -0,0 +1,35 @@
+import pickle
+
+from gpu_dispatch.protocol import TaskSuccess
+from gpu_dispatch.serialization import decode_message, dumps, encode_message, loads
+
+
+def test_serialization_out_of_band_buffers():
+    """Out-of-band buffers survive the frame round trip as writable memory."""
+    payload = bytearray(b"abc" * 1000)
+    frames = dumps({"buf": pickle.PickleBuffer(payload)})
+    assert len(frames) == 3
+
+    restored = loads(bytearray(b"".join(frames)))["buf"]
+    assert bytes(restored) == bytes(payload)
+    restored[0] = ord("z")
+
+
+def test_message_encoding_roundtrip():
+    """Protocol messages encode to compact tuples and decode back."""
+    message = TaskSuccess(task_id=5, data="x", worker_id=0)
+    encoded = encode_message(message)
+    assert isinstance(encoded, tuple)
+    assert len(pickle.dumps(encoded)) < len(pickle.dumps(message))
+    assert decode_message(encoded) == message
+
+
+def test_worker_encoded_messages_match_protocol():
+    """Tuples the worker loop builds by hand decode to the right messages."""
+    from gpu_dispatch.protocol import TaskError, TaskStarted, TaskTimeout
+    from gpu_dispatch.worker import _ERROR, _STARTED, _SUCCESS, _TIMEOUT
+
+    assert decode_message((_SUCCESS, 1, "x", 0)) == TaskSuccess(task_id=1, data="x", worker_id=0)
+    assert decode_message((_ERROR, 2, "tb", 1)) == TaskError(task_id=2, error="tb", worker_id=1)
+    assert decode_message((_TIMEOUT, 3, 0.5, 2)) == TaskTimeout(task_id=3, timeout=0.5, worker_id=2)
+    assert decode_message((_STARTED, 4, 3)) == TaskStarted(task_id=4, worker_id=3)